@@ -0,0 +1,119 @@
+"""Background AI move computation for the pygame UI.
+
+The game loop asks for a move with ``request_move`` and then calls ``poll``
+once per frame until the move is ready, so rendering and input keep running
+while the AI thinks. The worker is a daemon thread, started by the first
+request: quitting the game never waits for a search in progress. ``cancel`` throws any pending result away
+and stops a time-budgeted search in progress, so the next request doesn't
+wait behind it.
+"""
+
+import queue
+import threading
+import time
+
+from game_logic import ai_smart_move, stop_ai_move
+
+
+class AIWorker:
+    """Runs ``ai_smart_move`` on a background thread.
+
+    ``min_think_time`` is the least number of seconds between a request and
+    ``poll`` returning its move, so the AI doesn't answer instantly; unlike a
+    ``time.sleep`` it doesn't block the caller. Pass another function with
+    the same arguments as ``search`` (e.g. ``game_logic.move_scores``) to
+    run that instead; ``poll`` then returns its result. ``stop`` is called
+    with no arguments to end a search whose result is no longer wanted
+    (e.g. ``game_logic.stop_move_scores``), or None if it can't be ended.
+    """
+
+    def __init__(self, min_think_time=0.0, search=ai_smart_move, stop=stop_ai_move):
+        self.min_think_time = min_think_time
+        self.search = search
+        self.stop = stop
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every request and cancel
+        self._running = None  # Generation of the search in progress
+        self._result = None  # (generation, move, seconds, error) of the latest finished search
+        self._ready_at = 0.0
+        self.last_seconds = 0.0  # Search time of the move poll last returned
+        self._thread = None
+
+    def request_move(self, board, player_mark, ai_mark):
+        """Starts computing the AI's move on a copy of ``board``, ending any search still running."""
+        board = [row[:] for row in board]
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ai-worker", daemon=True)
+                self._thread.start()
+            self._stop_running()
+            self._generation += 1
+            self._result = None
+            self._ready_at = time.monotonic() + self.min_think_time
+            self._requests.put((self._generation, board, player_mark, ai_mark))
+
+    def poll(self):
+        """Returns the requested move once it is ready, otherwise None.
+
+        Re-raises any error the search raised. After a move is returned,
+        ``last_seconds`` holds how long the search itself took, not
+        counting ``min_think_time``.
+        """
+        with self._lock:
+            result = self._result
+            if result is None or result[0] != self._generation or time.monotonic() < self._ready_at:
+                return None
+            self._result = None
+        _, move, seconds, error = result
+        if error is not None:
+            raise error
+        self.last_seconds = seconds
+        return move
+
+    def ready_in(self):
+        """Returns the seconds until ``poll`` will return the requested move.
+
+        Returns None while the search is still running (or nothing was
+        requested), so the caller knows to keep polling.
+        """
+        with self._lock:
+            if self._result is None or self._result[0] != self._generation:
+                return None
+            return max(0.0, self._ready_at - time.monotonic())
+
+    def cancel(self):
+        """Discards the pending request.
+
+        A search that has already started is stopped if it is
+        time-budgeted, and otherwise runs to completion in the background;
+        either way its move is dropped.
+        """
+        with self._lock:
+            self._stop_running()
+            self._generation += 1
+            self._result = None
+
+    def _stop_running(self):
+        # Called with the lock held
+        if self._running is not None and self.stop is not None:
+            self.stop()
+
+    def _run(self):
+        while True:
+            generation, board, player_mark, ai_mark = self._requests.get()
+            with self._lock:
+                if generation != self._generation:
+                    continue  # Cancelled or superseded before it started
+                self._running = generation
+            move, error = None, None
+            start = time.perf_counter()
+            try:
+                move = self.search(board, player_mark, ai_mark)
+            except Exception as e:  # Handed to the UI thread by poll
+                error = e
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self._running = None
+                if generation == self._generation:
+                    self._result = (generation, move, seconds, error)
@@ -0,0 +1,102 @@
+"""Load-once asset manager for sounds, fonts and music."""
+
+import io
+import logging
+import os
+import threading
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SOUND_FILES = {
+    'win': 'win_sound.wav',
+    'click': 'click_sound.wav',
+    'draw': 'draw_sound.wav',
+}
+FONT_FILES = ('Quicksand-Regular.ttf',)
+MUSIC_FILE = 'soundtrack.wav'
+
+
+class AssetManager:
+    """Loads every sound and font file once and hands out the cached copies.
+
+    ``start`` decodes the sounds and reads the font files on a background
+    thread, and opens the soundtrack for streaming through
+    ``pygame.mixer.music`` rather than decoding it into memory. Lookups wait
+    for that thread if it is still running, so after startup they never
+    touch the disk. A missing or unreadable file is logged and its lookup
+    returns None (no sound, default font) instead of raising.
+    """
+
+    def __init__(self, asset_dir=ASSET_DIR, sound_files=SOUND_FILES, font_files=FONT_FILES, music_file=MUSIC_FILE):
+        self.asset_dir = asset_dir
+        self.sound_files = dict(sound_files)
+        self.font_files = tuple(font_files)
+        self.music_file = music_file
+        self.has_music = False
+        self._sounds = {}
+        self._font_data = {}
+        self._thread = None
+
+    def _path(self, name):
+        return os.path.join(self.asset_dir, name)
+
+    def start(self):
+        """Opens the music and starts preloading everything else in the background."""
+        if self._thread is not None:
+            return
+        self._open_music()
+        self._thread = threading.Thread(target=self._preload, name="asset-preload", daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        """Blocks until preloading has finished (starting it if needed)."""
+        if self._thread is None:
+            self.start()
+        self._thread.join()
+
+    def _open_music(self):
+        if self.music_file is None or not pygame.mixer.get_init():
+            return
+        try:
+            pygame.mixer.music.load(self._path(self.music_file))
+            self.has_music = True
+        except (pygame.error, OSError) as e:
+            logger.warning("No background music: %s", e)
+
+    def _preload(self):
+        for name, file_name in self.sound_files.items():
+            if not pygame.mixer.get_init():
+                break
+            try:
+                self._sounds[name] = pygame.mixer.Sound(self._path(file_name))
+            except (pygame.error, OSError) as e:
+                logger.warning("Sound %r unavailable: %s", name, e)
+        for file_name in self.font_files:
+            try:
+                with open(self._path(file_name), 'rb') as f:
+                    self._font_data[file_name] = f.read()
+            except OSError as e:
+                logger.warning("Font %r unavailable, using the default font: %s", file_name, e)
+
+    def sound(self, name):
+        """Returns the loaded ``pygame.mixer.Sound`` for ``name``, or None."""
+        self.wait()
+        return self._sounds.get(name)
+
+    def font(self, path, size):
+        """Creates a ``pygame.font.Font`` from the preloaded font file bytes.
+
+        ``path=None`` (or a font that failed to load) gives pygame's default
+        font. Matches the ``pygame.font.Font(path, size)`` call signature.
+        """
+        if path is None:
+            return pygame.font.Font(None, size)
+        self.wait()
+        data = self._font_data.get(path)
+        if data is None:
+            return pygame.font.Font(None, size)
+        return pygame.font.Font(io.BytesIO(data), size)
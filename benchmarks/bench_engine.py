@@ -0,0 +1,190 @@
+"""Benchmarks for the game_logic engine with regression checks.
+
+Times the search and board helpers on a fixed set of positions, writes the
+results as JSON and compares them with a stored baseline:
+
+    python -m benchmarks.bench_engine --output bench.json
+    python -m benchmarks.bench_engine --update-baseline
+
+Exits with status 1 if any metric is worse than the baseline by more than
+the threshold (25% by default).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import game_logic
+from engine import alphabeta, bitboard, perfect_play
+from engine.instrumentation import SearchStats
+from engine.summary import percentiles
+from engine.transposition import TranspositionTable
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Positions as (name, X positions, O positions); X is always to move next
+# when the counts are equal, O otherwise
+POSITIONS = (
+    ('empty', (), ()),
+    ('center_opening', (5,), ()),
+    ('corner_opening', (1,), ()),
+    ('edge_reply', (5,), (2,)),
+    ('midgame_fork', (1, 9), (5,)),
+    ('midgame_block', (1, 5), (9, 3)),
+    ('endgame', (1, 2, 6), (3, 4, 5)),
+)
+
+# Metrics where a higher value is better; everything else is lower-is-better
+HIGHER_IS_BETTER = ('nodes_per_sec',)
+
+
+def _board(x_positions, o_positions):
+    board = game_logic.create_board()
+    for position in x_positions:
+        game_logic.place_mark(board, 'X', position)
+    for position in o_positions:
+        game_logic.place_mark(board, 'O', position)
+    return board
+
+
+def _side_to_move(x_positions, o_positions):
+    return ('X', 'O') if len(x_positions) == len(o_positions) else ('O', 'X')
+
+
+def _search(root_function, me, opp, repeat):
+    # Cold searches with a fresh transposition table each time; nodes are
+    # counted in a separate run so the timed runs stay uninstrumented
+    stats = SearchStats(root_stones=bitboard.popcount(me | opp))
+    root_function(me, opp, TranspositionTable(), stats=stats)
+    nodes = stats.nodes
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        root_function(me, opp, TranspositionTable())
+        times.append(time.perf_counter() - start)
+    seconds = statistics.median(times)
+    return {'nodes': nodes, 'seconds': seconds, 'nodes_per_sec': nodes / seconds if seconds else 0.0}
+
+
+def _per_call(function, args_list, repeat):
+    # Median over repeats of the mean time per call, in microseconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in args_list:
+            function(*args)
+        times.append((time.perf_counter() - start) / len(args_list))
+    return {'per_call_us': statistics.median(times) * 1e6}
+
+
+def _latency(samples):
+    latency = percentiles(samples)
+    return {'p50_ms': latency[0.5] * 1e3, 'p90_ms': latency[0.9] * 1e3, 'p99_ms': latency[0.99] * 1e3}
+
+
+def run_benchmarks(repeat=5):
+    """Runs every benchmark and returns ``{name: {metric: value}}``."""
+    results = {}
+    boards = []
+    for name, x_positions, o_positions in POSITIONS:
+        board = _board(x_positions, o_positions)
+        boards.append(board)
+        mark, other = _side_to_move(x_positions, o_positions)
+        me = bitboard.marks_to_bits(board, mark)
+        opp = bitboard.marks_to_bits(board, other)
+        results['minimax/' + name] = _search(bitboard.best_move, me, opp, repeat)
+        results['alphabeta/' + name] = _search(alphabeta.best_move, me, opp, repeat)
+
+    results['check_win'] = _per_call(game_logic.check_win, [(b, m) for b in boards for m in 'XO'] * 100, repeat)
+    results['available_spots'] = _per_call(game_logic.available_spots, [(b,) for b in boards] * 100, repeat)
+
+    # ai_smart_move as the game uses it (shared tables, first-game rigging
+    # off), once answered from a perfect-play table and once searched. The
+    # table is built here, so a checkout without engine/perfect_play.bin
+    # times the same thing
+    session = game_logic.session
+    saved = session.first_game, session.perfect_play_table
+    session.first_game = False
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'perfect_play.bin')
+            perfect_play.build_table(path)
+            table = perfect_play.PerfectPlayTable(path)
+            try:
+                for name, session.perfect_play_table in (('lookup', table), ('search', None)):
+                    samples = []
+                    for _ in range(repeat * 20):
+                        for board, (_, x_positions, o_positions) in zip(boards, POSITIONS):
+                            mark, other = _side_to_move(x_positions, o_positions)
+                            start = time.perf_counter()
+                            game_logic.ai_smart_move(board, other, mark)
+                            samples.append(time.perf_counter() - start)
+                    results['ai_smart_move/' + name] = _latency(samples)
+            finally:
+                session.perfect_play_table = None
+                table.close()
+    finally:
+        session.first_game, session.perfect_play_table = saved
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of regression messages for metrics worse than ``threshold``."""
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        for metric, value in sorted(metrics.items()):
+            base = baseline.get(name, {}).get(metric)
+            if not base:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                change = base / value - 1 if value else float('inf')
+            else:
+                change = value / base - 1
+            if change > threshold:
+                regressions.append("%s %s: %.4g vs baseline %.4g (%.0f%% worse)"
+                                   % (name, metric, value, base, change * 100))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game_logic engine.")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before flagging, 0.25 = 25%%")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat)
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'results': results}
+
+    for name, metrics in sorted(results.items()):
+        print("%-28s %s" % (name, "  ".join("%s=%.4g" % item for item in sorted(metrics.items()))))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Baseline written to %s" % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at %s; run with --update-baseline to create one" % args.baseline)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print("REGRESSION " + message)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
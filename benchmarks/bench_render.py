@@ -0,0 +1,253 @@
+"""Frame-time benchmark for the pygame screens, runnable without a display.
+
+Runs each screen offscreen through SDL's dummy video driver at one or more
+resolutions, feeds it scripted input for a number of frames and reports
+frame-time percentiles and Python allocations per frame:
+
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --resolution 3840x2160 --frames 600 --output render.json
+    python -m benchmarks.bench_render --baseline render.json   # exit 1 on a >25% regression
+
+A frame is what ``SceneManager`` does once per tick: handle the frame's
+events, update, draw and push the changed rects to the display. Scenarios:
+
+    menu            pointer moving on and off a button (draw_buttons)
+    board_moves     a click on a free cell every frame, a full repaint every
+                    30 frames (draw_cell, draw_board, draw_marks)
+    board_full      a full repaint of a half-filled board every frame
+    game_over       pointer moving on and off a button (game-over screen)
+    win_animation   the confetti winner screen (game_additions.win_animation)
+
+Allocations come from ``tracemalloc`` in a second, untimed pass: ``alloc_kb``
+is how far the Python heap rose above its level at the start of the frame,
+``retained_bytes`` what the frame left allocated. Memory SDL allocates for
+surfaces is not seen by ``tracemalloc``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# main.py opens its window at import; give it a display that needs no screen. It
+# only opens the game log in main.main(), so benchmark games aren't recorded
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame  # noqa: E402
+
+import main  # noqa: E402
+from benchmarks.bench_engine import compare  # noqa: E402
+from engine.summary import percentiles  # noqa: E402
+from game_additions import WinAnimation  # noqa: E402
+
+RESOLUTIONS = ('1920x1080', '3840x2160')
+SCENARIOS = ('menu', 'board_moves', 'board_full', 'game_over', 'win_animation')
+
+
+class _Pointer:
+    # Scripted mouse: the screens read the pointer with pygame.mouse.get_pos,
+    # which the dummy driver can't move
+    def __init__(self):
+        self.pos = (0, 0)
+
+    def get_pos(self):
+        return self.pos
+
+    def move(self, pos):
+        self.pos = pos
+        return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+    def click(self, pos):
+        self.pos = pos
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+
+def _expose():
+    return pygame.event.Event(pygame.VIDEOEXPOSE)
+
+
+def _free_cell_center():
+    for row in range(main.board_rows):
+        for col in range(main.board_cols):
+            if main.game_board[row][col] not in ('X', 'O'):
+                return main.cell_rect(row, col).center
+    return None
+
+
+class _Scenario:
+    # Builds a screen and the scripted input for each of its ``frames`` frames
+    def __init__(self, name, pointer, frames, fps):
+        self.name = name
+        self.pointer = pointer
+        self.frames = frames
+        self.fps = fps
+
+    def new_scene(self):
+        if self.name == 'menu':
+            return main.MenuScene()
+        if self.name in ('board_moves', 'board_full'):
+            return main.TwoPlayerScene('X', 'O')
+        if self.name == 'game_over':
+            return main.GameOverScene()
+        if self.name == 'win_animation':
+            # Confetti keeps falling for the whole run
+            return main.AnimationScene(WinAnimation(main.screen, "WINNER", "PLAYER 1", main.WIDTH, main.HEIGHT,
+                                                    duration=self.frames / self.fps + 1.0,
+                                                    font=main.text_cache.font(main.title_font_size)))
+        raise ValueError("Unknown scenario %r, expected one of %s" % (self.name, SCENARIOS))
+
+    def events(self, frame, scene):
+        pointer = self.pointer
+        if self.name == 'menu':
+            button = scene.single_player_button
+            return [pointer.move(button.center if button is not None and frame % 2 else (0, 0))]
+        if self.name == 'game_over':
+            button = scene.play_again_button
+            return [pointer.move(button.center if button is not None and frame % 2 else (0, 0))]
+        if self.name == 'board_moves':
+            events = [pointer.click(_free_cell_center())]
+            if frame % 30 == 0:
+                events.append(_expose())
+            return events
+        if self.name == 'board_full':
+            if frame == 0:
+                # Half-fill the board once; no move is played, so the game never ends
+                for position in range(1, main.board_rows * main.board_cols + 1, 2):
+                    main.place_mark(main.game_board, 'X' if position % 4 == 1 else 'O', position)
+            return [_expose()]
+        return []
+
+
+def _run_frames(scenario, frames, warmup, measure):
+    # Runs warmup + frames frames; returns measure(frame function) results
+    scene = scenario.new_scene()
+    scene.enter()
+    dt = 1.0 / scenario.fps
+    state = {'scene': scene}
+
+    def frame(index):
+        scene = state['scene']
+        events = scenario.events(index, scene)
+        next_scene = None
+        for event in events:
+            next_scene = scene.handle_event(event)
+            if next_scene is not None:
+                break
+        if next_scene is None:
+            next_scene = scene.update(dt)
+        if next_scene is not None:
+            # A finished game or animation starts over, so every frame draws the same screen
+            scene.leave()
+            scene = state['scene'] = scenario.new_scene()
+            scene.enter()
+        rects = scene.draw()
+        if rects:
+            pygame.display.update(rects)
+
+    for index in range(warmup):
+        frame(index)
+    try:
+        return measure(frame, warmup, frames)
+    finally:
+        state['scene'].leave()
+
+
+def _time_frames(frame, start, frames):
+    times = []
+    for index in range(start, start + frames):
+        begin = time.perf_counter()
+        frame(index)
+        times.append(time.perf_counter() - begin)
+    return times
+
+
+def _trace_frames(frame, start, frames):
+    peaks = []
+    retained = 0
+    tracemalloc.start()
+    try:
+        for index in range(start, start + frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            frame(index)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained += current - before
+    finally:
+        tracemalloc.stop()
+    return peaks, retained
+
+
+def run_benchmarks(resolutions=RESOLUTIONS, scenarios=SCENARIOS, frames=300, warmup=10, fps=60):
+    """Runs every scenario at every resolution; returns ``{name: {metric: value}}``."""
+    pointer = _Pointer()
+    real_get_pos = pygame.mouse.get_pos
+    pygame.mouse.get_pos = pointer.get_pos
+    main.assets.wait()  # Fonts and sounds load in the background; don't time that
+    results = {}
+    try:
+        for resolution in resolutions:
+            width, height = (int(size) for size in resolution.split('x'))
+            main.set_resolution(width, height, 0)
+            for name in scenarios:
+                scenario = _Scenario(name, pointer, warmup + frames, fps)
+                times = percentiles(_run_frames(scenario, frames, warmup, _time_frames), (0.5, 0.9, 0.99, 1.0))
+                peaks, retained = _run_frames(scenario, frames, warmup, _trace_frames)
+                results['%s/%s' % (name, resolution)] = {
+                    'p50_ms': times[0.5] * 1e3,
+                    'p90_ms': times[0.9] * 1e3,
+                    'p99_ms': times[0.99] * 1e3,
+                    'max_ms': times[1.0] * 1e3,
+                    'alloc_kb': percentiles(peaks, (0.5,))[0.5] / 1024,
+                    'retained_bytes': retained / frames,
+                }
+    finally:
+        pygame.mouse.get_pos = real_get_pos
+    return results
+
+
+def main_(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pygame screens offscreen.")
+    parser.add_argument('--resolution', action='append', metavar='WxH',
+                        help="screen size, repeatable (default: %s)" % ' and '.join(RESOLUTIONS))
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="screen to run, repeatable (default: all)")
+    parser.add_argument('--frames', type=int, default=300, help="timed frames per scenario")
+    parser.add_argument('--warmup', type=int, default=10, help="untimed frames first, to fill the caches")
+    parser.add_argument('--rows', type=int, default=3, help="board rows")
+    parser.add_argument('--cols', type=int, default=3, help="board columns")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before flagging, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    main.configure_board(args.rows, args.cols, min(args.rows, args.cols))
+    results = run_benchmarks(args.resolution or RESOLUTIONS, args.scenario or SCENARIOS, args.frames, args.warmup)
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'pygame': pygame.version.ver,
+              'results': results}
+
+    for name, metrics in sorted(results.items()):
+        print("%-26s p50 %7.3fms  p90 %7.3fms  p99 %7.3fms  max %7.3fms  alloc %7.1fKB  retained %6.0fB/frame" % (
+            name, metrics['p50_ms'], metrics['p90_ms'], metrics['p99_ms'], metrics['max_ms'], metrics['alloc_kb'],
+            metrics['retained_bytes']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    # Allocation noise is a few hundred bytes; only timings are compared
+    timings = {name: {metric: value for metric, value in metrics.items() if metric.endswith('_ms')}
+               for name, metrics in results.items()}
+    regressions = compare(timings, baseline, args.threshold)
+    for message in regressions:
+        print("REGRESSION " + message)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_())
@@ -0,0 +1 @@
+"""Game engine for Tic Tac Toe: board representation and AI search."""
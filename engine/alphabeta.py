@@ -0,0 +1,152 @@
+"""Alpha-beta search with tactical move ordering.
+
+Scores match ``bitboard.negamax`` exactly, so ``best_move`` picks the same
+move as the plain minimax search, but far fewer nodes are visited: an
+immediate win ends the node at once, forced blocks are tried next, then the
+cells on the most win lines (on 3x3: the center, the corners, the edges).
+Every function takes the board ``Geometry``, so the same search runs on
+larger m,n,k boards.
+"""
+
+import time
+
+from engine import bitboard
+
+INFINITY = float('inf')
+
+
+def _grow(bound):
+    # Inverse of bitboard.shrink: maps a bound on a parent's score to the
+    # matching bound on the negated child score
+    if bound > 0:
+        return bound + 1
+    if bound < 0:
+        return bound - 1
+    return 0
+
+
+def ordered_moves(me, opp, geometry=bitboard.STANDARD):
+    """Returns the empty cells of a position as bits, most promising first.
+
+    Moves that win on the spot come first, then moves that block one of the
+    opponent's wins, then the rest in ``geometry.move_order``.
+    """
+    empty = geometry.full & ~(me | opp)
+    wins = geometry.threat_bits(me, empty)
+    blocks = geometry.threat_bits(opp, empty) & ~wins
+    rest = empty & ~(wins | blocks)
+    moves = list(bitboard.iter_moves(wins))
+    moves.extend(bitboard.iter_moves(blocks))
+    moves.extend(move for move in geometry.move_order if rest & move)
+    return moves
+
+
+def alphabeta(me, opp, alpha=-INFINITY, beta=INFINITY, table=None, geometry=bitboard.STANDARD, stats=None):
+    """Fail-soft alpha-beta version of ``bitboard.negamax``.
+
+    The result is exact when it lies strictly between ``alpha`` and
+    ``beta``; otherwise it is a bound on the exact score on the side of the
+    window it fell. An optional ``TranspositionTable`` keeps
+    ``(lower, upper)`` bounds per canonical position; don't share it with
+    the plain negamax search, which stores exact scores. Pass an
+    ``instrumentation.SearchStats`` as ``stats`` to count nodes and cut-offs.
+    """
+    score = bitboard.terminal_score(me, opp, geometry)
+    if score is not None:
+        return score
+    return _alphabeta(me, opp, alpha, beta, table, geometry, stats)
+
+
+def _alphabeta(me, opp, alpha, beta, table, geometry, stats):
+    # Nobody has won yet: each child only needs its new stone's lines checked
+    occupied = me | opp
+    if stats is not None:
+        stats.visit(occupied)
+    if occupied == geometry.full:
+        return 0
+    moves = ordered_moves(me, opp, geometry)
+    if geometry.won_through(me | moves[0], moves[0]):
+        return geometry.win_score - 1  # Win on this move, nothing scores higher
+
+    if table is not None:
+        key = geometry.canonical_key(me, opp)
+        entry = table.get(key)
+        if entry is None:
+            lower, upper = -INFINITY, INFINITY
+        else:
+            lower, upper = entry
+            if lower >= beta:
+                return lower
+            if upper <= alpha:
+                return upper
+            if lower == upper:
+                return lower
+            alpha = max(alpha, lower)
+            beta = min(beta, upper)
+
+    # Winning moves are ordered first, so none of these children is won yet
+    best_score = -INFINITY
+    for move in moves:
+        child_alpha = -_grow(beta)
+        child_beta = -_grow(max(alpha, best_score))
+        score = bitboard.shrink(-_alphabeta(opp, me | move, child_alpha, child_beta, table, geometry, stats))
+        if score > best_score:
+            best_score = score
+            if best_score >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                break
+
+    if table is not None:
+        if best_score <= alpha:
+            upper = best_score
+        elif best_score >= beta:
+            lower = best_score
+        else:
+            lower = upper = best_score
+        table.store(key, (lower, upper))
+    return best_score
+
+
+def best_move(me, opp, table=None, geometry=bitboard.STANDARD, stats=None):
+    """Returns ``(position, score)`` of the best move for ``me``.
+
+    Same result as ``bitboard.best_move``, ties included: each candidate is
+    searched with a window that only proves it better than the current best
+    (or equal to it, if it sits at a lower position). Returns
+    ``(None, None)`` on a full board. With ``stats``, each root move's
+    score (a bound if it failed low), time and node count is recorded.
+    """
+    best_score = None
+    best_position = None
+    for move in ordered_moves(me, opp, geometry):
+        position = bitboard.bit_position(move)
+        if best_score is None:
+            alpha = -INFINITY
+        elif position < best_position:
+            alpha = best_score - 1
+        else:
+            alpha = best_score
+        if stats is not None:
+            start, start_nodes = time.perf_counter(), stats.nodes
+        score = -alphabeta(opp, me | move, -INFINITY, -alpha, table, geometry, stats)
+        if stats is not None:
+            stats.root_moves.append((position, score, time.perf_counter() - start, stats.nodes - start_nodes))
+        if score > alpha:
+            best_score = score
+            best_position = position
+    return best_position, best_score
+
+
+def move_scores(me, opp, table=None, geometry=bitboard.STANDARD, stats=None):
+    """Returns ``{position: score}`` for every legal move of ``me``.
+
+    Each score is exact and on the same scale as ``best_move``'s (positive
+    when the move wins for ``me``, larger for quicker wins). Every move gets
+    a full-window search, so this costs more than ``best_move``; the bounds
+    in ``table`` carry over from one move to the next.
+    """
+    scores = {}
+    for move in ordered_moves(me, opp, geometry):
+        scores[bitboard.bit_position(move)] = -alphabeta(opp, me | move, -INFINITY, INFINITY, table, geometry, stats)
+    return scores
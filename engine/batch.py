@@ -0,0 +1,78 @@
+"""Vectorized evaluation of many boards at once with NumPy.
+
+Boards are rows of an ``(N, cells)`` integer array, one column per position
+in row-major order (position ``p`` is column ``p - 1``) holding
+``EMPTY``, ``X`` or ``O``. Win checks count each mark on every win line with
+one matrix product against a precomputed line matrix.
+
+This module needs NumPy; the rest of the engine does not.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from engine import bitboard
+
+EMPTY, X, O = 0, 1, 2
+_CODES = {'X': X, 'O': O}
+
+BatchResult = namedtuple('BatchResult', ['x_wins', 'o_wins', 'draws', 'legal_moves'])
+BatchResult.__doc__ = """Per-board results of ``evaluate``.
+
+``x_wins``, ``o_wins`` and ``draws`` are boolean arrays of shape ``(N,)``; a
+draw is a full board that nobody has won. ``legal_moves`` is a boolean
+``(N, cells)`` mask of the empty cells.
+"""
+
+
+@lru_cache(maxsize=None)
+def win_line_matrix(geometry=bitboard.STANDARD):
+    """Returns the ``(lines, cells)`` 0/1 matrix of a geometry's win lines."""
+    matrix = np.zeros((len(geometry.win_masks), geometry.cells), dtype=np.float32)
+    for line, mask in enumerate(geometry.win_masks):
+        for cell in range(geometry.cells):
+            if mask >> cell & 1:
+                matrix[line, cell] = 1
+    matrix.flags.writeable = False
+    return matrix
+
+
+def encode_boards(boards):
+    """Encodes ``game_logic`` list-of-lists boards as an ``(N, cells)`` array."""
+    return np.array([[_CODES.get(cell, EMPTY) for row in board for cell in row] for board in boards],
+                    dtype=np.int8)
+
+
+def encode_bitboards(x_bits, o_bits, geometry=bitboard.STANDARD):
+    """Encodes parallel sequences of X and O bitboards as an ``(N, cells)`` array."""
+    shifts = np.arange(geometry.cells)
+    # Python ints can be wider than 64 bits, so expand through object arrays
+    x_cells = (np.array(x_bits, dtype=object)[:, None] >> shifts & 1).astype(np.int8)
+    o_cells = (np.array(o_bits, dtype=object)[:, None] >> shifts & 1).astype(np.int8)
+    return x_cells * X + o_cells * O
+
+
+def decode_indices(indices, geometry=bitboard.STANDARD):
+    """Expands base-3 position indices (see ``perfect_play``) into an ``(N, cells)`` array."""
+    indices = np.asarray(indices, dtype=np.int64)
+    powers = 3 ** np.arange(geometry.cells, dtype=np.int64)
+    return (indices[:, None] // powers % 3).astype(np.int8)
+
+
+def evaluate(encoded, geometry=bitboard.STANDARD):
+    """Computes win flags, draw flags and legal moves for every board.
+
+    ``encoded`` is an ``(N, cells)`` array of ``EMPTY``/``X``/``O`` codes.
+    Returns a ``BatchResult``.
+    """
+    encoded = np.asarray(encoded)
+    if encoded.ndim != 2 or encoded.shape[1] != geometry.cells:
+        raise ValueError("Expected boards of shape (N, %d), got %s" % (geometry.cells, encoded.shape))
+    lines = win_line_matrix(geometry).T
+    x_wins = ((encoded == X).astype(np.float32) @ lines == geometry.k).any(axis=1)
+    o_wins = ((encoded == O).astype(np.float32) @ lines == geometry.k).any(axis=1)
+    legal_moves = encoded == EMPTY
+    draws = ~legal_moves.any(axis=1) & ~x_wins & ~o_wins
+    return BatchResult(x_wins, o_wins, draws, legal_moves)
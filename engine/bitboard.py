@@ -0,0 +1,355 @@
+"""Integer bitboards for m,n,k boards (3x3 tic-tac-toe by default).
+
+Each player's marks are held in one int: position ``p`` (1-based, row-major
+as in ``game_logic``) maps to bit ``p - 1``. A ``Geometry`` precomputes the
+win-line masks of one board shape, so win checks are a handful of ANDs and
+only the lines through the last stone need testing. Empty cells are walked
+with the ``bits & -bits`` lowest-set-bit trick.
+"""
+
+import time
+from functools import lru_cache
+
+# Bits per chunk of the symmetry lookup tables (one chunk covers a 3x3 board)
+_CHUNK_BITS = 9
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+
+# Line directions as (row step, col step): across, down, both diagonals
+_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Geometry:
+    """Board shape and win rule: ``rows`` x ``cols`` cells, ``k`` in a row wins.
+
+    Attributes are precomputed once per shape; use ``get_geometry`` to share
+    instances.
+
+    ``win_score`` is the score of a won position for the side that won. It
+    shrinks by one per ply so quicker wins (and slower losses) are preferred,
+    as in ``game_logic.minimax``, and is one more than the cell count so it
+    never shrinks to zero.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        if rows < 1 or cols < 1:
+            raise ValueError("Board needs at least one row and one column, got %dx%d" % (rows, cols))
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError("Win length %d doesn't fit on a %dx%d board" % (k, rows, cols))
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+        self.win_score = self.cells + 1
+
+        lines = []
+        for row in range(rows):
+            for col in range(cols):
+                for row_step, col_step in _DIRECTIONS:
+                    end_row = row + row_step * (k - 1)
+                    end_col = col + col_step * (k - 1)
+                    if 0 <= end_row < rows and 0 <= end_col < cols:
+                        mask = 0
+                        for i in range(k):
+                            mask |= 1 << ((row + row_step * i) * cols + col + col_step * i)
+                        lines.append(mask)
+        self.win_masks = tuple(sorted(set(lines)))
+
+        # At most 4 * k lines run through any one cell, whatever the board size
+        self.lines_through = tuple(
+            tuple(mask for mask in self.win_masks if mask >> cell & 1) for cell in range(self.cells)
+        )
+
+        # Cells on the most lines first, nearest the center breaking ties.
+        # On 3x3 that is the center, then the corners, then the edges.
+        def priority(cell):
+            row, col = divmod(cell, cols)
+            distance = abs(2 * row - (rows - 1)) + abs(2 * col - (cols - 1))
+            return -len(self.lines_through[cell]), distance, cell
+
+        self.move_order = tuple(1 << cell for cell in sorted(range(self.cells), key=priority))
+
+        # Small boards scan every line; big ones only the lines through stones
+        self._scan_all_lines = len(self.win_masks) <= 64
+        self._symmetry_chunks = None
+
+    def __repr__(self):
+        return "Geometry(rows=%d, cols=%d, k=%d)" % (self.rows, self.cols, self.k)
+
+    def has_won(self, bits):
+        """Returns True if ``bits`` covers any complete line."""
+        for mask in self.win_masks:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def won_through(self, bits, move):
+        """Returns True if ``bits`` completes a line through the cell ``move``.
+
+        Only the lines through that cell are tested, so the cost does not
+        grow with the board.
+        """
+        for mask in self.lines_through[move.bit_length() - 1]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def threat_bits(self, bits, empty):
+        """Returns the mask of ``empty`` cells that would complete a line for ``bits``."""
+        if self._scan_all_lines:
+            masks = self.win_masks
+        else:
+            masks = set()
+            for stone in iter_moves(bits):
+                masks.update(self.lines_through[stone.bit_length() - 1])
+        threats = 0
+        for mask in masks:
+            missing = mask & ~bits
+            if missing & empty == missing and missing & (missing - 1) == 0:
+                threats |= missing
+        return threats
+
+    def _cell_maps(self):
+        # Cell permutations for the symmetries of the board: all 8 for a
+        # square, identity, both mirrors and the half turn for a rectangle
+        rows, cols = self.rows, self.cols
+        last_row, last_col = rows - 1, cols - 1
+        transforms = [
+            lambda r, c: (r, c),
+            lambda r, c: (last_row - r, last_col - c),
+            lambda r, c: (r, last_col - c),
+            lambda r, c: (last_row - r, c),
+        ]
+        if rows == cols:
+            transforms += [
+                lambda r, c: (c, last_row - r),
+                lambda r, c: (last_col - c, r),
+                lambda r, c: (c, r),
+                lambda r, c: (last_col - c, last_row - r),
+            ]
+        maps = []
+        for transform in transforms:
+            cell_map = []
+            for cell in range(self.cells):
+                new_row, new_col = transform(*divmod(cell, cols))
+                cell_map.append(new_row * cols + new_col)
+            maps.append(cell_map)
+        return maps
+
+    def _build_symmetry_chunks(self):
+        # For each symmetry, one table per 9-bit chunk of the board mapping
+        # the chunk's bits to their image, so transforming a bitboard takes
+        # one lookup per chunk
+        chunks = []
+        for cell_map in self._cell_maps():
+            tables = []
+            for start in range(0, self.cells, _CHUNK_BITS):
+                width = min(_CHUNK_BITS, self.cells - start)
+                table = [0] * (1 << width)
+                for bits in range(1, 1 << width):
+                    low = bits & -bits
+                    table[bits] = table[bits ^ low] | 1 << cell_map[start + low.bit_length() - 1]
+                tables.append(tuple(table))
+            chunks.append(tuple(tables))
+        return tuple(chunks)
+
+    def transform(self, bits, symmetry):
+        """Returns the image of ``bits`` under symmetry number ``symmetry``."""
+        if self._symmetry_chunks is None:
+            self._symmetry_chunks = self._build_symmetry_chunks()
+        image = 0
+        for table in self._symmetry_chunks[symmetry]:
+            chunk = bits & _CHUNK_MASK
+            if chunk:
+                image |= table[chunk]
+            bits >>= _CHUNK_BITS
+        return image
+
+    @property
+    def symmetries(self):
+        """Number of symmetries folded together by ``canonical_key``."""
+        return 8 if self.rows == self.cols else 4
+
+    def canonical_key(self, me, opp):
+        """Returns a key shared by all symmetric images of a position.
+
+        The key is the smallest ``me << cells | opp`` over the symmetries, so
+        it also encodes which side is to move.
+        """
+        if self._symmetry_chunks is None:
+            self._symmetry_chunks = self._build_symmetry_chunks()
+        if len(self._symmetry_chunks[0]) == 1:
+            # Single-chunk boards (up to 3x3) need one lookup per symmetry
+            shift = self.cells
+            return min(tables[0][me] << shift | tables[0][opp] for tables in self._symmetry_chunks)
+        transform = self.transform
+        return min(transform(me, symmetry) << self.cells | transform(opp, symmetry)
+                   for symmetry in range(self.symmetries))
+
+
+@lru_cache(maxsize=None)
+def get_geometry(rows=3, cols=3, k=3):
+    """Returns the shared ``Geometry`` for a board shape."""
+    return Geometry(rows, cols, k)
+
+
+# Classic tic-tac-toe, and the module-level shortcuts that assume it
+STANDARD = get_geometry(3, 3, 3)
+SIZE = 3
+CELLS = STANDARD.cells
+FULL = STANDARD.full
+WIN_SCORE = STANDARD.win_score
+WIN_MASKS = STANDARD.win_masks
+
+
+def position_bit(position):
+    """Returns the bit for a 1-based board position."""
+    return 1 << (position - 1)
+
+
+def bit_position(bit):
+    """Returns the 1-based board position of a single-bit mask."""
+    return bit.bit_length()
+
+
+def marks_to_bits(board, mark):
+    """Builds the bitboard of ``mark`` from a list-of-lists board."""
+    bits = 0
+    cell_bit = 1
+    for row in board:
+        for cell in row:
+            if cell == mark:
+                bits |= cell_bit
+            cell_bit <<= 1
+    return bits
+
+
+def occupied_bits(board):
+    """Builds the bitboard of every marked cell on a list-of-lists board."""
+    return marks_to_bits(board, 'X') | marks_to_bits(board, 'O')
+
+
+def popcount(bits):
+    """Returns the number of marks in ``bits``."""
+    return bin(bits).count('1')
+
+
+def has_won(bits, geometry=STANDARD):
+    """Returns True if ``bits`` covers any complete line."""
+    return geometry.has_won(bits)
+
+
+def threat_bits(bits, empty, geometry=STANDARD):
+    """Returns the mask of ``empty`` cells that would complete a line for ``bits``."""
+    return geometry.threat_bits(bits, empty)
+
+
+def canonical_key(me, opp, geometry=STANDARD):
+    """Returns a key shared by all symmetric images of a position."""
+    return geometry.canonical_key(me, opp)
+
+
+def iter_moves(empty):
+    """Yields the single-bit masks of ``empty`` from the lowest position up."""
+    while empty:
+        move = empty & -empty
+        yield move
+        empty ^= move
+
+
+def move_positions(empty):
+    """Returns the 1-based positions set in ``empty`` in ascending order."""
+    return [bit_position(move) for move in iter_moves(empty)]
+
+
+def winning_bit(bits, occupied, geometry=STANDARD):
+    """Returns the lowest empty bit that completes a line for ``bits``, or 0."""
+    threats = geometry.threat_bits(bits, geometry.full & ~occupied)
+    return threats & -threats
+
+
+def shrink(score):
+    """Moves a score one step towards zero to account for one more ply."""
+    if score > 0:
+        return score - 1
+    if score < 0:
+        return score + 1
+    return 0
+
+
+def terminal_score(me, opp, geometry=STANDARD):
+    """Returns the score of a finished position for the side to move, else None."""
+    if geometry.has_won(opp):
+        return -geometry.win_score
+    if geometry.has_won(me):
+        return geometry.win_score
+    if me | opp == geometry.full:
+        return 0
+    return None
+
+
+def negamax(me, opp, table=None, geometry=STANDARD, stats=None):
+    """Scores the position for the side to move (``me``).
+
+    Wins are worth ``geometry.win_score`` minus the number of plies needed to
+    reach them, losses the negation, draws zero. Scores are relative to this
+    position, so an optional ``TranspositionTable`` can reuse them wherever
+    the position (or a symmetric image of it) turns up again. Pass an
+    ``instrumentation.SearchStats`` as ``stats`` to count nodes.
+    """
+    score = terminal_score(me, opp, geometry)
+    if score is not None:
+        return score
+    return _negamax(me, opp, table, geometry, stats)
+
+
+def _negamax(me, opp, table, geometry, stats):
+    # Nobody has won yet: each child only needs its new stone's lines checked
+    occupied = me | opp
+    if stats is not None:
+        stats.visit(occupied)
+    if occupied == geometry.full:
+        return 0
+
+    if table is not None:
+        key = geometry.canonical_key(me, opp)
+        cached = table.get(key)
+        if cached is not None:
+            return cached
+
+    won_through = geometry.won_through
+    best_score = -geometry.win_score - 1
+    for move in iter_moves(geometry.full & ~occupied):
+        child = me | move
+        if won_through(child, move):
+            score = geometry.win_score - 1
+        else:
+            score = shrink(-_negamax(opp, child, table, geometry, stats))
+        if score > best_score:
+            best_score = score
+
+    if table is not None:
+        table.store(key, best_score)
+    return best_score
+
+
+def best_move(me, opp, table=None, geometry=STANDARD, stats=None):
+    """Returns ``(position, score)`` of the best move for ``me``.
+
+    Ties go to the lowest position, matching the root loop of
+    ``game_logic.ai_smart_move``. Returns ``(None, None)`` on a full board.
+    With ``stats``, each root move's score, time and node count is recorded.
+    """
+    best_score = None
+    best_position = None
+    for move in iter_moves(geometry.full & ~(me | opp)):
+        if stats is not None:
+            start, start_nodes = time.perf_counter(), stats.nodes
+        score = -negamax(opp, me | move, table, geometry, stats)
+        if stats is not None:
+            stats.root_moves.append((bit_position(move), score, time.perf_counter() - start,
+                                     stats.nodes - start_nodes))
+        if best_score is None or score > best_score:
+            best_score = score
+            best_position = bit_position(move)
+    return best_position, best_score
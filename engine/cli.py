@@ -0,0 +1,279 @@
+"""Text front end for the engine: play in a terminal, analyze or serve moves.
+
+    python -m engine play [--mark O]
+    python -m engine analyze "X.O/.X./..."
+    python -m engine serve < boards.txt
+
+Boards are written row by row with ``X``, ``O`` and ``.`` (or ``-``, ``_``
+or the cell's number) for empty cells; ``/``, ``|`` and spaces separate
+cells and are otherwise ignored. Boards over 9 cells need a separator
+around each cell number. The side to move follows from the mark counts,
+X moving first.
+
+``serve`` reads one board per line and answers each with the position the
+AI plays, or ``error: ...`` for a line it can't use, so a service can keep
+one engine process around instead of paying for pygame on every spawn.
+"""
+
+import argparse
+import sys
+
+from engine import alphabeta, bitboard, perfect_play
+from engine.deepening import DIFFICULTIES, IterativeDeepening
+from engine.mcts import MCTS
+from engine.parallel import ParallelSearch
+from engine.session import SEARCH_MODES, Session, default_search_mode
+
+_EMPTY_CELLS = '.-_'
+_SEPARATORS = '/|'
+
+
+def _board_tokens(text, geometry):
+    # Splits a board into one string per cell
+    tokens = []
+    lines = text.upper().splitlines()
+    # Rows written with '|' between cells may have rules of plain dashes between them
+    ruled = len(lines) > 1 and any('|' in line for line in lines)
+    for line in lines:
+        rule = line.strip()
+        if rule and not rule.strip('-+') and ('+' in rule or ruled):
+            continue  # A rule between rows as format_board draws them, not a row of '-' cells
+        for separator in _SEPARATORS:
+            line = line.replace(separator, ' ')
+        for chunk in line.split():
+            if geometry.cells <= 9 or not any(char.isdigit() for char in chunk):
+                tokens.extend(chunk)  # Every character is a cell, digits included
+            elif chunk.isdigit():
+                tokens.append(chunk)  # Bigger boards number cells with several digits
+            else:
+                raise ValueError("Cell number in %r needs a separator ('/', '|' or a space) around it on boards "
+                                 "over 9 cells" % chunk)
+    return tokens
+
+
+def parse_board(text, geometry=bitboard.STANDARD):
+    """Returns ``(x_bits, o_bits)`` for a board written as described above.
+
+    Raises ValueError if the board has the wrong number of cells, an
+    unknown character or mark counts no game can reach. On boards of up to
+    9 cells every digit is a cell; on bigger ones a cell number must be
+    separated from the cells around it. Output of ``format_board`` reads
+    back as the same board.
+    """
+    tokens = _board_tokens(text, geometry)
+    x_bits = o_bits = 0
+    for position, token in enumerate(tokens):
+        if token == 'X':
+            x_bits |= 1 << position
+        elif token == 'O':
+            o_bits |= 1 << position
+        elif not token.isdigit() and token not in _EMPTY_CELLS:
+            raise ValueError("Unexpected %r in board %r" % (token, text))
+    if len(tokens) != geometry.cells:
+        raise ValueError("Board %r has %d cells, expected %d" % (text, len(tokens), geometry.cells))
+    x_count, o_count = bitboard.popcount(x_bits), bitboard.popcount(o_bits)
+    if x_count - o_count not in (0, 1):
+        raise ValueError("Board %r has %d X and %d O; X moves first" % (text, x_count, o_count))
+    return x_bits, o_bits
+
+
+def format_board(x_bits, o_bits, geometry=bitboard.STANDARD):
+    """Returns the board as text, numbering the empty cells."""
+    width = len(str(geometry.cells))
+    rows = []
+    for row in range(geometry.rows):
+        cells = []
+        for col in range(geometry.cols):
+            position = row * geometry.cols + col + 1
+            bit = bitboard.position_bit(position)
+            mark = 'X' if x_bits & bit else 'O' if o_bits & bit else str(position)
+            cells.append(mark.center(width + 2))
+        rows.append('|'.join(cells))
+    separator = '+'.join(['-' * (width + 2)] * geometry.cols)
+    return ('\n' + separator + '\n').join(rows)
+
+
+def to_move(x_bits, o_bits):
+    """Returns 'X' or 'O', whichever moves next."""
+    return 'X' if bitboard.popcount(x_bits) == bitboard.popcount(o_bits) else 'O'
+
+
+def describe_score(score, mark, geometry=bitboard.STANDARD):
+    """Puts a search score for ``mark`` (the side to move) into words."""
+    if score == 0:
+        return "draw"
+    plies = geometry.win_score - abs(score)
+    winner = mark if score > 0 else ('O' if mark == 'X' else 'X')
+    return "%s wins in %d %s" % (winner, plies, "ply" if plies == 1 else "plies")
+
+
+def _new_session(args):
+    table = perfect_play.load_table() if (args.rows, args.cols, args.win_length) == (3, 3, 3) else None
+    mcts = parallel = deepening = None
+    if args.search == 'mcts':
+        time_budget = None if args.iterations else args.time
+        mcts = MCTS(time_budget=time_budget, iterations=args.iterations, processes=args.processes)
+    elif args.search == 'parallel':
+        parallel = ParallelSearch(args.processes or None)
+    elif args.search == 'deepening':
+        deepening = IterativeDeepening(args.depth, args.time)
+    session = Session(args.rows, args.cols, args.win_length, search_mode=args.search, first_game=False,
+                      perfect_play_table=table, mcts=mcts, parallel=parallel, deepening=deepening)
+    if args.difficulty:
+        session.set_difficulty(args.difficulty)
+    return session
+
+
+def _winner(x_bits, o_bits, geometry):
+    if geometry.has_won(x_bits):
+        return 'X'
+    if geometry.has_won(o_bits):
+        return 'O'
+    return None
+
+
+def play(args, stdin=sys.stdin, stdout=sys.stdout):
+    """Plays one game against the AI in the terminal."""
+    session = _new_session(args)
+    geometry = session.geometry
+    human = args.mark
+    x_bits = o_bits = 0
+    while True:
+        winner = _winner(x_bits, o_bits, geometry)
+        if winner is not None or x_bits | o_bits == geometry.full:
+            print(format_board(x_bits, o_bits, geometry), file=stdout)
+            print("%s wins!" % winner if winner else "It's a draw!", file=stdout)
+            return 0
+
+        mark = to_move(x_bits, o_bits)
+        me, opp = (x_bits, o_bits) if mark == 'X' else (o_bits, x_bits)
+        if mark == human:
+            print(format_board(x_bits, o_bits, geometry), file=stdout)
+            stdout.write("Your move (%s): " % mark)
+            stdout.flush()
+            line = stdin.readline()
+            if not line:
+                return 1
+            try:
+                position = int(line)
+            except ValueError:
+                print("Enter a cell number", file=stdout)
+                continue
+            if not 1 <= position <= geometry.cells or (x_bits | o_bits) & bitboard.position_bit(position):
+                print("Cell %d isn't free" % position, file=stdout)
+                continue
+        else:
+            position = session.ai_move(me, opp, mark == 'X')
+            print("AI (%s) plays %d" % (mark, position), file=stdout)
+
+        if mark == 'X':
+            x_bits |= bitboard.position_bit(position)
+        else:
+            o_bits |= bitboard.position_bit(position)
+
+
+def analyze(args, stdout=sys.stdout):
+    """Prints the best move and the game's outcome under perfect play.
+
+    With ``--search mcts`` or ``deepening`` (or a ``--difficulty``) the
+    search keeps to its budget, so the outcome is only reported when that
+    search proves it.
+    """
+    session = _new_session(args)
+    geometry = session.geometry
+    x_bits, o_bits = parse_board(args.board, geometry)
+    print(format_board(x_bits, o_bits, geometry), file=stdout)
+
+    winner = _winner(x_bits, o_bits, geometry)
+    if winner is not None or x_bits | o_bits == geometry.full:
+        print("Game over: %s" % ("%s won" % winner if winner else "draw"), file=stdout)
+        return 0
+    mark = to_move(x_bits, o_bits)
+    me, opp = (x_bits, o_bits) if mark == 'X' else (o_bits, x_bits)
+    if session.search_mode == 'mcts':
+        result = session.mcts.search(me, opp)
+        if result.iterations:
+            outcome = "%.0f%% of %d playouts won (draws count half)" % (result.value * 100, result.iterations)
+        else:
+            outcome = describe_score(geometry.win_score, mark, geometry)  # Won on the spot, nothing searched
+        print("%s to move: best move %d, %s" % (mark, result.position, outcome), file=stdout)
+        return 0
+    if session.search_mode == 'deepening':
+        position, score = session.deepening.best_move(me, opp, geometry)
+        empty = bitboard.popcount(geometry.full & ~(me | opp))
+        if score is None or (abs(score) < 1 and session.deepening.depth < empty):
+            outcome = "no forced result within %d plies" % session.deepening.depth
+        elif abs(score) < 1:
+            outcome = "draw"  # Searched to the end of the game
+        else:
+            # best_move scores the position, alphabeta.best_move the one after the move
+            outcome = describe_score(score + 1 if score > 0 else score - 1, mark, geometry)
+        print("%s to move: best move %d, %s" % (mark, position, outcome), file=stdout)
+        return 0
+    if session.search_mode == 'parallel':
+        position, score = session.parallel.best_move(me, opp, session.alphabeta_table, geometry)
+    else:
+        position, score = alphabeta.best_move(me, opp, session.alphabeta_table, geometry)
+    print("%s to move: best move %d, %s" % (mark, position, describe_score(score, mark, geometry)), file=stdout)
+    return 0
+
+
+def serve(args, stdin=sys.stdin, stdout=sys.stdout):
+    """Answers one board per line of ``stdin`` with the AI's move."""
+    session = _new_session(args)
+    geometry = session.geometry
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        if line == 'quit':
+            break
+        try:
+            x_bits, o_bits = parse_board(line, geometry)
+            if _winner(x_bits, o_bits, geometry) is not None or x_bits | o_bits == geometry.full:
+                raise ValueError("Game is already over")
+            mark = to_move(x_bits, o_bits)
+            me, opp = (x_bits, o_bits) if mark == 'X' else (o_bits, x_bits)
+            reply = str(session.ai_move(me, opp, mark == 'X'))
+        except ValueError as e:
+            reply = "error: %s" % e
+        stdout.write(reply + '\n')
+        stdout.flush()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m engine', description="Tic Tac Toe engine without the UI.")
+    parser.add_argument('--rows', type=int, default=3)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--win-length', type=int, default=3)
+    parser.add_argument('--search', choices=SEARCH_MODES,
+                        help="search to use when the perfect-play table can't answer (default: alphabeta, or "
+                             "deepening on boards over 16 cells)")
+    parser.add_argument('--difficulty', choices=tuple(DIFFICULTIES),
+                        help="play at a depth/time budget (overrides the search options)")
+    parser.add_argument('--time', type=float, default=1.0, help="seconds per move for --search mcts or deepening")
+    parser.add_argument('--depth', type=int, help="maximum plies for --search deepening (default: no limit)")
+    parser.add_argument('--iterations', type=int, help="iterations per move for --search mcts (instead of --time)")
+    parser.add_argument('--processes', type=int, default=0,
+                        help="worker processes for --search mcts (0 = in process) or parallel (0 = one per core)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    play_parser = commands.add_parser('play', help="play against the AI in the terminal")
+    play_parser.add_argument('--mark', choices=('X', 'O'), default='X', help="your mark (X moves first)")
+    play_parser.set_defaults(run=play)
+
+    analyze_parser = commands.add_parser('analyze', help="show the best move for a board")
+    analyze_parser.add_argument('board', help='e.g. "X.O/.X./..."')
+    analyze_parser.set_defaults(run=analyze)
+
+    serve_parser = commands.add_parser('serve', help="read boards from stdin, write moves to stdout")
+    serve_parser.set_defaults(run=serve)
+
+    args = parser.parse_args(argv)
+    if args.search is None:
+        args.search = default_search_mode(args.rows, args.cols)
+    try:
+        return args.run(args)
+    except ValueError as e:  # Bad board shape or board text
+        parser.error(str(e))
@@ -0,0 +1,280 @@
+"""Iterative-deepening alpha-beta with a heuristic evaluation and a deadline.
+
+``IterativeDeepening.best_move`` searches one ply deeper at a time until it
+runs out of depth or time, so the AI answers within its budget on any board
+size. Positions at the depth limit are scored by ``evaluate``, which counts
+the win lines each side could still complete. The search is abandoned as
+soon as the deadline passes, and the best move of the deepest search so far
+is played.
+
+Scores use the ``bitboard.negamax`` scale: wins are ``win_score`` minus the
+plies to reach them, so always at least 1, and draws are 0. Heuristic
+scores lie strictly between -1 and 1, so a proven win always beats a good
+position and a proven loss is worse than any bad one.
+
+On boards bigger than ``NEIGHBORHOOD_MIN_CELLS`` only cells next to a stone
+are searched; moves far from the action are almost never the best ones.
+
+Difficulty levels are budgets: ``IterativeDeepening.for_difficulty('easy')``
+looks one ply ahead, 'expert' searches as deep as two seconds allow.
+"""
+
+import math
+import time
+from functools import lru_cache
+
+from engine import alphabeta, bitboard
+
+# (max depth, seconds per move) for each difficulty; None means no depth limit
+DIFFICULTIES = {
+    'easy': (1, 0.05),
+    'medium': (2, 0.25),
+    'hard': (4, 1.0),
+    'expert': (None, 2.0),
+}
+
+NEIGHBORHOOD_MIN_CELLS = 25
+
+# Weight of a line holding n stones of one side and none of the other
+_LINE_WEIGHTS = tuple(4 ** n for n in range(64))
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _column_masks(geometry):
+    # Cells not in the first column, and cells not in the last column
+    left = right = 0
+    for cell in range(geometry.cells):
+        col = cell % geometry.cols
+        if col:
+            left |= 1 << cell
+        if col != geometry.cols - 1:
+            right |= 1 << cell
+    return left, right
+
+
+def neighborhood(bits, geometry=bitboard.STANDARD):
+    """Returns the cells next to (or on) any cell of ``bits``, diagonals included."""
+    not_first_col, not_last_col = _column_masks(geometry)
+    grown = bits | ((bits << 1) & not_first_col) | ((bits >> 1) & not_last_col)
+    return (grown | (grown << geometry.cols) | (grown >> geometry.cols)) & geometry.full
+
+
+def evaluate(me, opp, geometry=bitboard.STANDARD):
+    """Heuristic score of an unfinished position for the side to move, between -1 and 1.
+
+    Every line still open to one side counts for that side, four times as
+    much for each stone already on it.
+    """
+    if geometry._scan_all_lines:
+        masks = geometry.win_masks
+    else:
+        masks = set()
+        for stone in bitboard.iter_moves(me | opp):
+            masks.update(geometry.lines_through[stone.bit_length() - 1])
+    popcount = bitboard.popcount
+    score = 0
+    for mask in masks:
+        mine = me & mask
+        theirs = opp & mask
+        if not theirs:
+            if mine:
+                score += _LINE_WEIGHTS[popcount(mine)]
+        elif not mine:
+            score -= _LINE_WEIGHTS[popcount(theirs)]
+    return score / (abs(score) + 64)
+
+
+def _shrink(score):
+    # bitboard.shrink for wins and losses; heuristic scores don't age
+    if score >= 1:
+        return score - 1
+    if score <= -1:
+        return score + 1
+    return score
+
+
+def _grow(bound):
+    # Inverse of _shrink for the window handed to a child
+    if bound >= 1:
+        return bound + 1
+    if bound <= -1:
+        return bound - 1
+    return bound
+
+
+class IterativeDeepening:
+    """Depth- and time-limited search; see the module docstring.
+
+    ``max_depth`` caps the plies searched (None for no cap) and
+    ``time_budget`` the seconds per move (None for no limit). After a
+    search, ``depth`` is the deepest ply count completed and ``stopped``
+    says whether ``stop`` cut it short.
+    """
+
+    def __init__(self, max_depth=None, time_budget=1.0):
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.depth = 0
+        self.stopped = False
+        self._deadline = math.inf
+        self._stats = None
+
+    @classmethod
+    def for_difficulty(cls, difficulty):
+        """Returns a search with the budget of one of the ``DIFFICULTIES``."""
+        if difficulty not in DIFFICULTIES:
+            raise ValueError("Unknown difficulty %r, expected one of %s" % (difficulty, tuple(DIFFICULTIES)))
+        return cls(*DIFFICULTIES[difficulty])
+
+    def stop(self):
+        """Ends a search running on another thread as if its time were up.
+
+        Its ``best_move`` or ``move_scores`` call returns what it found so
+        far within a node.
+        """
+        self.stopped = True
+        self._deadline = -math.inf
+
+    def _start(self):
+        self.stopped = False
+        self._deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else math.inf
+
+    def _moves(self, me, opp, geometry):
+        moves = alphabeta.ordered_moves(me, opp, geometry)
+        occupied = me | opp
+        if geometry.cells >= NEIGHBORHOOD_MIN_CELLS and occupied:
+            # Wins and blocks always touch a stone, so they survive the cut
+            near = neighborhood(occupied, geometry)
+            moves = [move for move in moves if move & near]
+        return moves
+
+    def _search(self, me, opp, depth, alpha, beta, geometry):
+        if time.perf_counter() > self._deadline:
+            raise _OutOfTime
+        occupied = me | opp
+        if self._stats is not None:
+            self._stats.visit(occupied)
+        if occupied == geometry.full:
+            return 0
+        moves = self._moves(me, opp, geometry)
+        if geometry.won_through(me | moves[0], moves[0]):
+            return geometry.win_score - 1
+        if depth == 0:
+            return evaluate(me, opp, geometry)
+
+        best_score = -math.inf
+        for move in moves:
+            score = _shrink(-self._search(opp, me | move, depth - 1, -_grow(beta), -_grow(max(alpha, best_score)),
+                                          geometry))
+            if score > best_score:
+                best_score = score
+                if best_score >= beta:
+                    if self._stats is not None:
+                        self._stats.cutoffs += 1
+                    break
+        return best_score
+
+    def best_move(self, me, opp, geometry=bitboard.STANDARD, stats=None):
+        """Returns ``(position, score)`` of the best move found for ``me`` within the budget.
+
+        There is always a move while the board has a free cell, even if the
+        deadline passes before the first ply is searched. ``score`` is None
+        then, and ``(None, None)`` is returned on a full board. With
+        ``stats``, each root move's score, time and node count at the
+        deepest ply searched is recorded.
+        """
+        self._start()
+        self._stats = stats
+        self.depth = 0
+        moves = self._moves(me, opp, geometry)
+        if not moves:
+            return None, None
+        best_move, best_score = moves[0], None
+        if len(moves) == 1:
+            return self._unsearched(best_move, None, stats)
+        if geometry.won_through(me | best_move, best_move):
+            return self._unsearched(best_move, geometry.win_score - 1, stats)
+
+        empty = bitboard.popcount(geometry.full & ~(me | opp))
+        max_depth = empty if self.max_depth is None else min(self.max_depth, empty)
+        iteration_move = None
+        try:
+            for depth in range(1, max_depth + 1):
+                # Last iteration's best move goes first, so a search cut short
+                # has already rescored it at the new depth
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+                iteration_move = iteration_score = None
+                root_moves = []
+                for move in moves:
+                    alpha = -math.inf if iteration_score is None else iteration_score
+                    if stats is not None:
+                        start, start_nodes = time.perf_counter(), stats.nodes
+                    score = _shrink(-self._search(opp, me | move, depth - 1, -math.inf, -_grow(alpha), geometry))
+                    if stats is not None:
+                        root_moves.append((bitboard.bit_position(move), score, time.perf_counter() - start,
+                                           stats.nodes - start_nodes))
+                    if iteration_score is None or score > iteration_score:
+                        iteration_move, iteration_score = move, score
+                best_move, best_score = iteration_move, iteration_score
+                self.depth = depth
+                if stats is not None:
+                    stats.root_moves = root_moves
+                if abs(best_score) >= 1:
+                    break  # Proven win or loss; searching deeper won't change it
+        except _OutOfTime:
+            # Moves finished at the unfinished depth are better informed
+            if iteration_move is not None:
+                best_move, best_score = iteration_move, iteration_score
+                if stats is not None:
+                    stats.root_moves = root_moves
+        finally:
+            self._stats = None
+        return bitboard.bit_position(best_move), best_score
+
+    @staticmethod
+    def _unsearched(move, score, stats):
+        # A forced move or a win on the spot, played without a search
+        position = bitboard.bit_position(move)
+        if stats is not None:
+            stats.root_moves.append((position, score, 0.0, 0))
+        return position, score
+
+    def move_scores(self, me, opp, geometry=bitboard.STANDARD):
+        """Returns ``{position: score}`` for the moves of ``me`` searched within the budget.
+
+        Scores are on the scale of ``alphabeta.move_scores``: the score of
+        the position after the move, for ``me``, so a move that wins on the
+        spot scores ``win_score``. Every move gets a full window at each
+        depth, so a score is exact
+        once it is a proven win or loss (at least 1 in size) or the search
+        reached the end of the game; otherwise it is a heuristic between -1
+        and 1. Moves the search skips (far from every stone on big boards)
+        are left out, as are all moves if the deadline passes first.
+        """
+        self._start()
+        self.depth = 0
+        moves = self._moves(me, opp, geometry)
+        empty = bitboard.popcount(geometry.full & ~(me | opp))
+        max_depth = empty if self.max_depth is None else min(self.max_depth, empty)
+        scores = {}
+        try:
+            for depth in range(1, max_depth + 1):
+                for move in moves:
+                    position = bitboard.bit_position(move)
+                    if abs(scores.get(position, 0)) >= 1:
+                        continue  # Proven at a shallower depth already
+                    if geometry.won_through(me | move, move):
+                        scores[position] = geometry.win_score
+                        continue
+                    scores[position] = -self._search(opp, me | move, depth - 1, -math.inf, math.inf, geometry)
+                self.depth = depth
+                if all(abs(score) >= 1 for score in scores.values()):
+                    break
+        except _OutOfTime:
+            pass  # Moves rescored at the unfinished depth keep their better-informed score
+        return scores
@@ -0,0 +1,246 @@
+"""Lazy enumeration of the game tree from any position.
+
+``positions`` walks every continuation of a board depth first and yields
+one ``Position`` per node without ever holding the tree: memory grows with
+the depth of the walk, not the size of the tree. Finished positions are the
+leaves, so on the full tree they are exactly the possible games.
+``unique=True`` yields each position only once however many move orders
+reach it, and ``symmetric=True`` also folds rotations and reflections
+together (both keep a set of the positions seen). ``games`` yields the move
+sequences themselves.
+
+The aggregators consume any of these streams one item at a time:
+
+    >>> outcomes = outcomes_by_depth(positions())
+    >>> outcomes[9].x_wins, outcomes[9].draws
+    (81792, 46080)
+
+From the empty 3x3 board there are 255,168 games (131,184 won by X, 77,904
+by O, 46,080 drawn), 5,478 distinct positions and 765 up to symmetry;
+``python -m engine.gametree --check`` walks the tree and checks all of them.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter, namedtuple
+
+from engine import bitboard
+from engine.summary import Outcomes
+
+Position = namedtuple('Position', 'x_bits o_bits depth to_move finished winner')
+Position.__doc__ = """One node of the game tree.
+
+``depth`` counts the plies played since the board the walk started from and
+``to_move`` is 'X' or 'O' by the mark counts, X moving first. ``winner`` is
+'X', 'O' or None for a draw once ``finished``, and None before.
+"""
+
+Game = namedtuple('Game', 'moves winner')
+Game.__doc__ = """One finished continuation: the 1-based ``moves`` played and the ``winner`` (None for a draw)."""
+
+# (games, X wins, O wins, draws, positions, positions up to symmetry) from the empty 3x3 board
+STANDARD_COUNTS = (255168, 131184, 77904, 46080, 5478, 765)
+
+
+def _start(x_bits, o_bits, geometry):
+    # Checks the starting board; returns (x to move, finished, winner)
+    if x_bits & o_bits or (x_bits | o_bits) & ~geometry.full:
+        raise ValueError("X and O overlap or lie off the %dx%d board" % (geometry.rows, geometry.cols))
+    x_count, o_count = bitboard.popcount(x_bits), bitboard.popcount(o_bits)
+    if x_count - o_count not in (0, 1):
+        raise ValueError("%d X and %d O can't arise in a game; X moves first" % (x_count, o_count))
+    if geometry.has_won(x_bits):
+        return x_count == o_count, True, 'X'
+    if geometry.has_won(o_bits):
+        return x_count == o_count, True, 'O'
+    return x_count == o_count, x_bits | o_bits == geometry.full, None
+
+
+def positions(x_bits=0, o_bits=0, geometry=bitboard.STANDARD, unique=False, symmetric=False, max_depth=None):
+    """Yields a ``Position`` for every node of the game tree below a board, the board itself first.
+
+    Children come in ascending order of the move played. Without ``unique``
+    or ``symmetric``, a position reached by several move orders is yielded
+    once per order. ``max_depth`` stops the walk that many plies down.
+    Raises ValueError for a board no game can reach.
+    """
+    x_to_move, finished, winner = _start(x_bits, o_bits, geometry)
+    seen = None
+    if unique or symmetric:
+        seen = {geometry.canonical_key(x_bits, o_bits) if symmetric else (x_bits, o_bits)}
+    canonical_key = geometry.canonical_key
+    won_through = geometry.won_through
+    full = geometry.full
+
+    # Each entry is a node still to be yielded; its children are pushed when it is
+    stack = [(x_bits, o_bits, 0, x_to_move, finished, winner)]
+    while stack:
+        x_bits, o_bits, depth, x_to_move, finished, winner = stack.pop()
+        yield Position(x_bits, o_bits, depth, 'X' if x_to_move else 'O', finished, winner)
+        if finished or depth == max_depth:
+            continue
+        occupied = x_bits | o_bits
+        children = []
+        for move in bitboard.iter_moves(full & ~occupied):
+            if x_to_move:
+                child_x, child_o, won = x_bits | move, o_bits, won_through(x_bits | move, move)
+            else:
+                child_x, child_o, won = x_bits, o_bits | move, won_through(o_bits | move, move)
+            if seen is not None:
+                key = canonical_key(child_x, child_o) if symmetric else (child_x, child_o)
+                if key in seen:
+                    continue
+                seen.add(key)
+            if won:
+                children.append((child_x, child_o, depth + 1, not x_to_move, True, 'X' if x_to_move else 'O'))
+            else:
+                children.append((child_x, child_o, depth + 1, not x_to_move, occupied | move == full, None))
+        children.reverse()  # Lowest move comes off the stack first
+        stack.extend(children)
+
+
+def games(x_bits=0, o_bits=0, geometry=bitboard.STANDARD):
+    """Yields a ``Game`` for every way play can continue from a board to the end.
+
+    Games come in lexicographic order of their moves. A finished board
+    yields one game with no moves.
+    """
+    x_to_move, finished, winner = _start(x_bits, o_bits, geometry)
+    if finished:
+        yield Game((), winner)
+        return
+    won_through = geometry.won_through
+    full = geometry.full
+    moves = []
+    # One iterator of untried moves per ply, so the walk keeps no more than the current line
+    pending = [bitboard.iter_moves(full & ~(x_bits | o_bits))]
+    played = []
+    while pending:
+        move = next(pending[-1], None)
+        if move is None:
+            pending.pop()
+            if played:
+                last = played.pop()
+                moves.pop()
+                x_to_move = not x_to_move
+                if x_to_move:
+                    x_bits ^= last
+                else:
+                    o_bits ^= last
+            continue
+        if x_to_move:
+            x_bits |= move
+            won = won_through(x_bits, move)
+        else:
+            o_bits |= move
+            won = won_through(o_bits, move)
+        moves.append(move.bit_length())
+        if won or x_bits | o_bits == full:
+            yield Game(tuple(moves), ('X' if x_to_move else 'O') if won else None)
+            moves.pop()
+            if x_to_move:
+                x_bits ^= move
+            else:
+                o_bits ^= move
+            continue
+        played.append(move)
+        x_to_move = not x_to_move
+        pending.append(bitboard.iter_moves(full & ~(x_bits | o_bits)))
+
+
+def outcomes_by_depth(items):
+    """Returns ``{depth: Outcomes}`` over the finished positions (or ``Game``s) in a stream.
+
+    A ``Game``'s depth is its number of moves. Unfinished positions are
+    skipped, so over ``positions()`` this counts the games by length.
+    """
+    by_depth = {}
+    for item in items:
+        if isinstance(item, Game):
+            depth = len(item.moves)
+        elif item.finished:
+            depth = item.depth
+        else:
+            continue
+        outcomes = by_depth.get(depth)
+        if outcomes is None:
+            outcomes = by_depth[depth] = Outcomes()
+        outcomes.add(item.winner)
+    return by_depth
+
+
+def count_by_depth(items):
+    """Returns a ``Counter`` of the depths of the positions in a stream."""
+    return Counter(item.depth for item in items)
+
+
+def check_standard():
+    """Walks the whole 3x3 tree and returns a message for every count that differs from ``STANDARD_COUNTS``."""
+    games_played = Outcomes()
+    for game in games():
+        games_played.add(game.winner)
+    counts = {
+        'games': games_played.games,
+        'X wins': games_played.x_wins,
+        'O wins': games_played.o_wins,
+        'draws': games_played.draws,
+        'positions': sum(1 for _ in positions(unique=True)),
+        'positions up to symmetry': sum(1 for _ in positions(symmetric=True)),
+    }
+    errors = ["%s: %d, expected %d" % (name, count, expected)
+              for (name, count), expected in zip(counts.items(), STANDARD_COUNTS) if count != expected]
+    # The leaves of the full walk are the same games
+    leaves = sum(outcomes.games for outcomes in outcomes_by_depth(positions()).values())
+    if leaves != STANDARD_COUNTS[0]:
+        errors.append("finished positions: %d, expected %d" % (leaves, STANDARD_COUNTS[0]))
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count the game tree below a board, depth by depth.")
+    parser.add_argument('board', nargs='?', help='starting board, e.g. "X.O/.X./..." (default: empty)')
+    parser.add_argument('--rows', type=int, default=3)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--win-length', type=int, default=3)
+    parser.add_argument('--unique', action='store_true', help="count each position once")
+    parser.add_argument('--symmetric', action='store_true', help="count symmetric positions once")
+    parser.add_argument('--max-depth', type=int, help="stop this many plies down")
+    parser.add_argument('--check', action='store_true', help="check the 3x3 totals against the known counts")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        start = time.perf_counter()
+        errors = check_standard()
+        for error in errors:
+            print("MISMATCH " + error)
+        print("%s in %.2fs" % ("FAILED" if errors else "3x3 game tree ok", time.perf_counter() - start))
+        return 1 if errors else 0
+
+    from engine.cli import parse_board
+    geometry = bitboard.get_geometry(args.rows, args.cols, args.win_length)
+    try:
+        x_bits, o_bits = parse_board(args.board, geometry) if args.board else (0, 0)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    nodes = Counter()
+    outcomes = {}
+    for position in positions(x_bits, o_bits, geometry, args.unique, args.symmetric, args.max_depth):
+        nodes[position.depth] += 1
+        if position.finished:
+            outcomes.setdefault(position.depth, Outcomes()).add(position.winner)
+    seconds = time.perf_counter() - start
+
+    print("depth  positions   finished     X wins     O wins      draws")
+    for depth in sorted(nodes):
+        finished = outcomes.get(depth, Outcomes())
+        print("%5d %10d %10d %10d %10d %10d" % (depth, nodes[depth], finished.games, finished.x_wins,
+                                                 finished.o_wins, finished.draws))
+    print("%d positions, %d finished, in %.2fs" % (sum(nodes.values()), sum(o.games for o in outcomes.values()),
+                                                   seconds))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
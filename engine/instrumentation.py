@@ -0,0 +1,124 @@
+"""Opt-in search statistics and profiling hooks.
+
+Nothing is collected until a hook or profiler is registered: searches get
+``stats=None`` and pay one ``is None`` check per node. With a hook
+registered, ``game_logic`` hands every search a ``SearchStats`` and passes
+it to the hooks when the move is chosen::
+
+    from engine import instrumentation
+    instrumentation.add_hook(lambda stats: print(stats.as_dict()))
+
+To see where search time goes, profile only the searches::
+
+    profiler = cProfile.Profile()
+    with instrumentation.profiling(profiler):
+        play_some_games()
+    profiler.print_stats('cumulative')
+"""
+
+import contextlib
+import time
+
+_hooks = []
+_profilers = []
+
+
+class SearchStats:
+    """Counters for one search.
+
+    ``source`` says how the move was found ('alphabeta', 'minimax',
+    'perfect_play', 'random', ...). ``root_moves`` holds one
+    ``(position, score, seconds, nodes)`` tuple per root move searched, in
+    every search mode; ``max_depth`` is the deepest ply reached below the
+    root. For 'mcts' a node is one iteration, so ``nodes_per_sec`` is
+    iterations per second, and a root move's score is its mean playout
+    result (1 = win, 0 = loss).
+    """
+
+    def __init__(self, source=None, root_stones=0):
+        self.source = source
+        self.root_stones = root_stones
+        self.nodes = 0
+        self.max_depth = 0
+        self.cutoffs = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.root_moves = []
+        self.move = None
+        self.seconds = 0.0
+
+    def visit(self, occupied):
+        """Counts a search node; ``occupied`` gives its depth below the root."""
+        self.nodes += 1
+        depth = bin(occupied).count('1') - self.root_stones
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def as_dict(self):
+        return {
+            'source': self.source,
+            'move': self.move,
+            'seconds': self.seconds,
+            'nodes': self.nodes,
+            'nodes_per_sec': self.nodes / self.seconds if self.seconds else 0.0,
+            'max_depth': self.max_depth,
+            'cutoffs': self.cutoffs,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'root_moves': [
+                {'position': position, 'score': score, 'seconds': seconds, 'nodes': nodes}
+                for position, score, seconds, nodes in self.root_moves
+            ],
+        }
+
+
+def add_hook(hook):
+    """Registers ``hook(stats)`` to run after every instrumented search."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def enabled():
+    """Returns True when searches should collect statistics."""
+    return bool(_hooks or _profilers)
+
+
+def start_search(source=None, root_stones=0):
+    """Returns a ``SearchStats`` for a new search, or None when disabled."""
+    if not (_hooks or _profilers):
+        return None
+    stats = SearchStats(source, root_stones)
+    for profiler in _profilers:
+        profiler.enable()
+    stats.seconds = time.perf_counter()
+    return stats
+
+
+def finish_search(stats, move=None, table=None, table_counts=(0, 0)):
+    """Completes ``stats`` and passes it to the hooks.
+
+    ``table_counts`` are the table's ``(hits, misses)`` from before the
+    search, so only this search's cache traffic is counted.
+    """
+    stats.seconds = time.perf_counter() - stats.seconds
+    for profiler in _profilers:
+        profiler.disable()
+    stats.move = move
+    if table is not None:
+        stats.cache_hits = table.hits - table_counts[0]
+        stats.cache_misses = table.misses - table_counts[1]
+    for hook in list(_hooks):
+        hook(stats)
+
+
+@contextlib.contextmanager
+def profiling(profiler):
+    """Runs ``profiler`` (e.g. a ``cProfile.Profile``) during searches only."""
+    _profilers.append(profiler)
+    try:
+        yield profiler
+    finally:
+        _profilers.remove(profiler)
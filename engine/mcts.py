@@ -0,0 +1,324 @@
+"""Monte Carlo tree search (UCT) for boards too big to search exhaustively.
+
+``MCTS.search`` grows a game tree for a time or iteration budget and plays
+the most visited move, so it gets stronger the longer it runs instead of
+needing the whole tree. Each iteration walks down the tree by the UCT rule,
+adds one new node and scores it with a random playout on the bitboards.
+
+Random playouts are blind to tactics, so the root is pruned first: a move
+that wins on the spot is played without searching, only blocks are
+searched while the opponent threatens to win, and on big boards only cells
+next to a stone (``deepening.neighborhood``) are candidates, so the visits
+aren't spread over hundreds of hopeless moves.
+
+The tree is kept between moves: when the next search starts from a
+position a move or two further down, that subtree becomes the new root and
+its statistics are reused.
+
+With ``processes`` set, playouts run in batches on a persistent process
+pool. A batch picks several leaves at once, with a virtual loss on each
+path so they spread out, and every worker plays out its share of the batch.
+
+    python -m engine.mcts --rows 7 --cols 7 --win-length 4 --time 2 --processes 4
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+
+from engine import bitboard, deepening
+
+SearchResult = namedtuple('SearchResult', 'position visits value iterations seconds')
+SearchResult.__doc__ = """Outcome of one ``MCTS.search``.
+
+``visits`` maps each root move's position to its visit count and ``value``
+is the chosen move's mean playout result for the side to move (1 = win,
+0.5 = draw, 0 = loss).
+"""
+
+
+def _iterations_per_sec(result):
+    return result.iterations / result.seconds if result.seconds else 0.0
+
+
+SearchResult.iterations_per_sec = property(_iterations_per_sec, doc="Iterations per second of wall time.")
+
+
+def rollout(me, opp, geometry, rng):
+    """Plays random moves to the end; returns 1 if ``me`` (to move) wins, -1 if it loses, 0 for a draw."""
+    moves = list(bitboard.iter_moves(geometry.full & ~(me | opp)))
+    rng.shuffle(moves)
+    won_through = geometry.won_through
+    sign = 1
+    for move in moves:
+        me |= move
+        if won_through(me, move):
+            return sign
+        me, opp = opp, me
+        sign = -sign
+    return 0
+
+
+def _rollout_batch(task):
+    # Runs in a pool worker: one playout per position
+    rows, cols, k, positions, seed = task
+    geometry = bitboard.get_geometry(rows, cols, k)
+    rng = random.Random(seed)
+    return [rollout(me, opp, geometry, rng) for me, opp in positions]
+
+
+class _Node:
+    # ``me`` is the side to move here. ``wins`` counts playout results from
+    # the point of view of the side that played ``move`` into this node.
+    __slots__ = ('me', 'opp', 'move', 'parent', 'children', 'untried', 'visits', 'wins', 'result')
+
+    def __init__(self, me, opp, move, parent, geometry, rng):
+        self.me = me
+        self.opp = opp
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+        self.result = None  # Value for the side that moved here, once the game is over
+        if move and geometry.won_through(opp, move):
+            self.result = 1.0
+        elif me | opp == geometry.full:
+            self.result = 0.5
+        if self.result is None:
+            self.untried = list(bitboard.iter_moves(geometry.full & ~(me | opp)))
+            rng.shuffle(self.untried)
+        else:
+            self.untried = []
+
+
+class MCTS:
+    """UCT search with a reusable tree.
+
+    ``time_budget`` (seconds) and ``iterations`` bound each search unless
+    ``search`` is given its own; with both, whichever runs out first wins.
+    ``exploration`` is the UCT constant. ``processes`` > 0 runs playouts on
+    that many worker processes in batches of ``batch_size`` per worker; call
+    ``close`` (or use ``with``) to shut the pool down.
+    """
+
+    def __init__(self, geometry=bitboard.STANDARD, time_budget=1.0, iterations=None, exploration=1.4,
+                 processes=0, batch_size=32, seed=None):
+        if time_budget is None and iterations is None:
+            raise ValueError("Give MCTS a time budget, an iteration budget or both")
+        self.geometry = geometry
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.processes = processes
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.root = None
+        self._pool = None
+        self._stopped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shuts the worker pool down, if one was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def stop(self):
+        """Ends a search running on another thread after its current iteration.
+
+        It returns the most visited move so far.
+        """
+        self._stopped = True
+
+    def reset(self, geometry=None):
+        """Drops the tree, and switches to ``geometry`` if one is given."""
+        if geometry is not None:
+            self.geometry = geometry
+        self.root = None
+
+    def _find_root(self, me, opp):
+        # Reuse the subtree for this position if it is at most two plies below the old root
+        candidates = [self.root] if self.root is not None else []
+        for _ in range(3):
+            for node in candidates:
+                if node.me == me and node.opp == opp:
+                    node.parent = None  # Let the rest of the old tree go
+                    return node
+            candidates = [child for node in candidates for child in node.children]
+        return _Node(me, opp, 0, None, self.geometry, self.rng)
+
+    def _select(self):
+        # Walks down by UCT to a node with untried moves (expanding one) or a
+        # finished game, adding a virtual loss to every node on the way
+        node = self.root
+        node.visits += 1
+        log = math.log
+        sqrt = math.sqrt
+        exploration = self.exploration
+        while not node.untried and node.children:
+            scale = exploration * sqrt(log(node.visits))
+            best_score = -1.0
+            for child in node.children:
+                if child.visits:
+                    score = child.wins / child.visits + scale / sqrt(child.visits)
+                else:
+                    score = math.inf
+                if score > best_score:
+                    best_score = score
+                    best = child
+            node = best
+            node.visits += 1
+        if node.untried:
+            move = node.untried.pop()
+            child = _Node(node.opp, node.me | move, move, node, self.geometry, self.rng)
+            node.children.append(child)
+            node = child
+            node.visits += 1
+        return node
+
+    @staticmethod
+    def _backpropagate(node, value):
+        # ``value`` is the result for the side that moved into ``node``
+        while node is not None:
+            node.wins += value
+            value = 1.0 - value
+            node = node.parent
+
+    def _playouts(self, leaves):
+        if not self.processes:
+            geometry, rng = self.geometry, self.rng
+            return [rollout(leaf.me, leaf.opp, geometry, rng) for leaf in leaves]
+        if self._pool is None:
+            import multiprocessing
+            self._pool = multiprocessing.Pool(self.processes)
+        geometry = self.geometry
+        chunk = -(-len(leaves) // self.processes)
+        tasks = [(geometry.rows, geometry.cols, geometry.k,
+                  [(leaf.me, leaf.opp) for leaf in leaves[start:start + chunk]], self.rng.getrandbits(64))
+                 for start in range(0, len(leaves), chunk)]
+        results = []
+        for batch in self._pool.map(_rollout_batch, tasks):
+            results.extend(batch)
+        return results
+
+    def search(self, me, opp, time_budget=None, iterations=None, stats=None):
+        """Searches the position with ``me`` to move and returns a ``SearchResult``.
+
+        ``position`` is None if the game is already over. A winning move is
+        returned at once, with no iterations. With ``stats``
+        (an ``instrumentation.SearchStats``), every iteration counts as a
+        node at the depth of the tree node it added, and each root move's
+        mean playout result, time and iterations in this search are
+        recorded.
+        """
+        if time_budget is None and iterations is None:
+            time_budget, iterations = self.time_budget, self.iterations
+        self._stopped = False
+        start = time.perf_counter()
+        deadline = start + time_budget if time_budget is not None else math.inf
+        limit = iterations if iterations is not None else math.inf
+
+        self.root = root = self._find_root(me, opp)
+        geometry = self.geometry
+        empty = geometry.full & ~(me | opp)
+        wins = geometry.threat_bits(me, empty) if root.result is None else 0
+        if wins:
+            # Lowest winning cell, as the exhaustive searches pick
+            position = bitboard.bit_position(wins & -wins)
+            if stats is not None:
+                stats.root_moves.append((position, 1.0, 0.0, 0))
+            return SearchResult(position, {}, 1.0, 0, time.perf_counter() - start)
+        candidates = geometry.threat_bits(opp, empty)  # Forced blocks
+        if not candidates and geometry.cells >= deepening.NEIGHBORHOOD_MIN_CELLS and me | opp:
+            candidates = deepening.neighborhood(me | opp, geometry) & empty
+        if candidates and root.result is None:
+            root.untried = [move for move in root.untried if move & candidates]
+            root.children = [child for child in root.children if child.move & candidates]
+        batch_size = self.batch_size * self.processes if self.processes else 1
+        root_counts = {}  # Root move -> [seconds, iterations] in this search, with stats
+        done = 0
+        while done < limit and root.untried + root.children and time.perf_counter() < deadline and not self._stopped:
+            if stats is not None:
+                batch_start = time.perf_counter()
+                batch = []
+            leaves = []
+            for _ in range(int(min(batch_size, limit - done))):
+                leaf = self._select()
+                done += 1
+                if stats is not None:
+                    stats.visit(leaf.me | leaf.opp)
+                    batch.append(leaf)
+                if leaf.result is not None:
+                    self._backpropagate(leaf, leaf.result)
+                else:
+                    leaves.append(leaf)
+            if leaves:
+                for leaf, result in zip(leaves, self._playouts(leaves)):
+                    # result is for the side to move at the leaf, not the side that moved there
+                    self._backpropagate(leaf, (1.0 - result) / 2.0)
+            if stats is not None:
+                # A batch's time is shared evenly by its iterations
+                share = (time.perf_counter() - batch_start) / len(batch)
+                for leaf in batch:
+                    while leaf.parent is not root:
+                        leaf = leaf.parent
+                    counts = root_counts.setdefault(leaf.move, [0.0, 0])
+                    counts[0] += share
+                    counts[1] += 1
+            if len(root.children) == 1 and not root.untried:
+                break  # Only one legal move, nothing to decide
+        seconds = time.perf_counter() - start
+
+        if not root.children:
+            return SearchResult(None, {}, None, done, seconds)
+        if stats is not None:
+            for child in root.children:
+                child_seconds, child_iterations = root_counts.get(child.move, (0.0, 0))
+                stats.root_moves.append((bitboard.bit_position(child.move),
+                                         child.wins / child.visits if child.visits else None, child_seconds,
+                                         child_iterations))
+        best = max(root.children, key=lambda child: (child.visits, -child.move))
+        visits = {bitboard.bit_position(child.move): child.visits for child in root.children}
+        return SearchResult(bitboard.bit_position(best.move), visits, best.wins / best.visits if best.visits else 0.0,
+                            done, seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one MCTS search and report its speed.")
+    parser.add_argument('--rows', type=int, default=7)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--win-length', type=int, default=4)
+    parser.add_argument('--time', type=float, default=1.0, help="seconds per move")
+    parser.add_argument('--iterations', type=int, help="iterations per move (instead of --time)")
+    parser.add_argument('--processes', type=int, default=0, help="playout worker processes (0 = in process)")
+    parser.add_argument('--moves', type=int, default=3, help="plies of self-play to time, reusing the tree")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    geometry = bitboard.get_geometry(args.rows, args.cols, args.win_length)
+    time_budget = None if args.iterations else args.time
+    with MCTS(geometry, time_budget, args.iterations, processes=args.processes, seed=args.seed) as mcts:
+        me = opp = 0
+        for _ in range(args.moves):
+            result = mcts.search(me, opp)
+            if result.position is None:
+                break
+            print("move %d  value %.3f  %d iterations in %.2fs (%.0f/s)" % (
+                result.position, result.value, result.iterations, result.seconds, result.iterations_per_sec))
+            if geometry.won_through(me | bitboard.position_bit(result.position), bitboard.position_bit(result.position)):
+                break
+            me, opp = opp, me | bitboard.position_bit(result.position)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
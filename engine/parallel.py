@@ -0,0 +1,132 @@
+"""Alpha-beta with the root moves spread over a persistent process pool.
+
+A single search can't use more than one core: the GIL serializes it.
+``ParallelSearch.best_move`` splits the root instead. The first move in
+``alphabeta.ordered_moves`` order is searched in this process to get a
+score to beat, then every other root move goes to a worker with the same
+window the serial ``alphabeta.best_move`` would give it, one move per
+class of symmetric moves. Each worker keeps its own transposition table
+between searches.
+
+Results are combined by score, ties going to the lowest position, so the
+move is the one ``alphabeta.best_move`` (and ``bitboard.best_move``) picks
+no matter which worker finishes first.
+"""
+
+import os
+import time
+
+from engine import alphabeta, bitboard, instrumentation
+from engine.transposition import TranspositionTable
+
+# One table per board shape in each worker, kept between searches
+_worker_tables = {}
+
+
+def _search_root_move(me, opp, move, alpha, table, geometry, stats):
+    # Scores one root move within the serial search's window; returns
+    # (score, seconds, nodes, deepest ply below the root)
+    start = time.perf_counter()
+    start_nodes = stats.nodes if stats is not None else 0
+    score = -alphabeta.alphabeta(opp, me | move, -alphabeta.INFINITY, -alpha, table, geometry, stats)
+    if stats is None:
+        return score, time.perf_counter() - start, 0, 0
+    return score, time.perf_counter() - start, stats.nodes - start_nodes, stats.max_depth
+
+
+def _worker_search(task):
+    # Runs in a pool worker
+    rows, cols, k, me, opp, move, alpha, count_nodes = task
+    table = _worker_tables.get((rows, cols, k))
+    if table is None:
+        table = _worker_tables[rows, cols, k] = TranspositionTable()
+    stats = instrumentation.SearchStats(root_stones=bitboard.popcount(me | opp)) if count_nodes else None
+    return _search_root_move(me, opp, move, alpha, table, bitboard.get_geometry(rows, cols, k), stats)
+
+
+class ParallelSearch:
+    """Root-split alpha-beta on ``processes`` worker processes (all cores by default).
+
+    The pool starts on the first search and lives until ``close``; use the
+    object as a context manager to have it closed for you. When the first
+    root move takes less than ``split_seconds`` to search, the rest is
+    cheaper to search here than to ship to the pool.
+    """
+
+    def __init__(self, processes=None, split_seconds=0.01):
+        self.processes = processes or os.cpu_count() or 1
+        self.split_seconds = split_seconds
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shuts the worker pool down, if one was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def best_move(self, me, opp, table=None, geometry=bitboard.STANDARD, stats=None):
+        """Returns ``(position, score)`` of the best move for ``me``, as ``alphabeta.best_move`` does.
+
+        ``table`` is the bounds table for the root move searched in this
+        process. With ``stats``, each root move's score (a bound if it
+        failed low), time and node count is recorded, and the nodes and
+        depth reached in the workers are added in.
+        """
+        moves = alphabeta.ordered_moves(me, opp, geometry)
+        if not moves:
+            return None, None
+
+        first = moves[0]
+        best_score, seconds, nodes, _ = _search_root_move(me, opp, first, -alphabeta.INFINITY, table, geometry, stats)
+        if stats is not None:
+            stats.root_moves.append((bitboard.bit_position(first), best_score, seconds, nodes))
+        if best_score == geometry.win_score - 1:
+            # Wins are ordered first, lowest position first, so nothing beats this one
+            return bitboard.bit_position(first), best_score
+
+        # Symmetric root moves score the same, so each class is searched once
+        classes = {}
+        for move in moves:
+            classes.setdefault(geometry.canonical_key(opp, me | move), []).append(move)
+        first_class = classes.pop(geometry.canonical_key(opp, me | first))
+        best_position = min(bitboard.bit_position(move) for move in first_class)
+        if stats is not None:
+            stats.root_moves.extend((bitboard.bit_position(move), best_score, 0.0, 0)
+                                    for move in first_class if move != first)
+
+        # Each class gets the widest window any of its moves needs: a move at a
+        # lower position than the best only has to tie its score
+        searches = []
+        for class_moves in classes.values():
+            lowest = min(bitboard.bit_position(move) for move in class_moves)
+            searches.append((class_moves, best_score - 1 if lowest < best_position else best_score))
+        if seconds < self.split_seconds:
+            results = [_search_root_move(me, opp, class_moves[0], alpha, table, geometry, stats)
+                       for class_moves, alpha in searches]
+        else:
+            if self._pool is None:
+                import multiprocessing
+                self._pool = multiprocessing.Pool(self.processes)
+            tasks = [(geometry.rows, geometry.cols, geometry.k, me, opp, class_moves[0], alpha, stats is not None)
+                     for class_moves, alpha in searches]
+            results = self._pool.map(_worker_search, tasks, chunksize=1)
+            if stats is not None:
+                stats.nodes += sum(nodes for _, _, nodes, _ in results)
+                stats.max_depth = max([stats.max_depth] + [depth for _, _, _, depth in results])
+
+        for (class_moves, alpha), (score, seconds, nodes, _) in zip(searches, results):
+            for move in class_moves:
+                position = bitboard.bit_position(move)
+                if stats is not None:
+                    stats.root_moves.append((position, score, seconds, nodes if move == class_moves[0] else 0))
+                if score > alpha and (score > best_score or (score == best_score and position < best_position)):
+                    best_score = score
+                    best_position = position
+        return best_position, best_score
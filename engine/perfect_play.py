@@ -0,0 +1,156 @@
+"""Precomputed perfect-play table for the 3x3 board.
+
+Every position reachable from the empty board (X moving first) is solved
+once by ``build_table`` and written to a flat binary file: an 8-byte header
+followed by one fixed-size record per base-3 position index, where cell
+``p`` contributes ``digit * 3 ** (p - 1)`` with 0 = empty, 1 = X, 2 = O.
+Each record holds the best move for the side to move and its score from
+that side's point of view (see ``bitboard.negamax``).
+
+At runtime the file is memory-mapped read-only, so a lookup is a couple of
+table reads and the pages are shared by every process that maps the file.
+
+Build it with::
+
+    python -m engine.perfect_play [--output PATH]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from engine import bitboard
+from engine.transposition import TranspositionTable
+
+MAGIC = b'TTTP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBH')  # magic, version, record size, reserved
+RECORD = struct.Struct('<Bb')  # best move (1-9), score
+POSITIONS = 3 ** bitboard.CELLS
+
+NO_MOVE = 0  # Terminal position: game already won or drawn
+UNREACHABLE = 0xFF  # Position cannot arise in a legal game
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfect_play.bin')
+
+
+def _digit_weights():
+    # Base-3 weight of every 9-bit mask, so an index is two table reads
+    weights = []
+    for bits in range(bitboard.FULL + 1):
+        weight = 0
+        for cell in range(bitboard.CELLS):
+            if bits >> cell & 1:
+                weight += 3 ** cell
+        weights.append(weight)
+    return tuple(weights)
+
+
+_WEIGHTS = _digit_weights()
+
+
+def position_index(x_bits, o_bits):
+    """Returns the base-3 record index of a position."""
+    return _WEIGHTS[x_bits] + 2 * _WEIGHTS[o_bits]
+
+
+def _solve_reachable():
+    # Walks the game tree from the empty board, solving each position once
+    table = TranspositionTable(max_entries=POSITIONS)
+    records = {}
+    stack = [(0, 0)]
+    while stack:
+        x_bits, o_bits = stack.pop()
+        index = position_index(x_bits, o_bits)
+        if index in records:
+            continue
+        x_to_move = bitboard.popcount(x_bits) == bitboard.popcount(o_bits)
+        me, opp = (x_bits, o_bits) if x_to_move else (o_bits, x_bits)
+
+        if bitboard.has_won(opp):
+            records[index] = (NO_MOVE, -bitboard.WIN_SCORE)
+            continue
+        if me | opp == bitboard.FULL:
+            records[index] = (NO_MOVE, 0)
+            continue
+
+        position, score = bitboard.best_move(me, opp, table)
+        records[index] = (position, score)
+        for move in bitboard.iter_moves(bitboard.FULL & ~(me | opp)):
+            if x_to_move:
+                stack.append((x_bits | move, o_bits))
+            else:
+                stack.append((x_bits, o_bits | move))
+    return records
+
+
+def build_table(path=DEFAULT_PATH):
+    """Solves every reachable position and writes the table to ``path``.
+
+    The file is written next to ``path`` and renamed into place, so readers
+    never map a half-written table. Returns the number of solved positions.
+    """
+    records = _solve_reachable()
+    data = bytearray(RECORD.pack(UNREACHABLE, 0) * POSITIONS)
+    for index, record in records.items():
+        RECORD.pack_into(data, index * RECORD.size, *record)
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(records)
+
+
+class PerfectPlayTable:
+    """Read-only, memory-mapped view of a table written by ``build_table``."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) != HEADER.size + POSITIONS * RECORD.size:
+            self.close()
+            raise ValueError("%s has the wrong size for a perfect-play table" % path)
+        magic, version, record_size, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError("%s is not a version %d perfect-play table" % (path, VERSION))
+
+    def lookup(self, x_bits, o_bits):
+        """Returns ``(position, score)`` for the side to move, or None.
+
+        The side to move follows from the mark counts (X moves first).
+        ``position`` is None for finished games; unreachable positions
+        return None.
+        """
+        offset = HEADER.size + position_index(x_bits, o_bits) * RECORD.size
+        position, score = RECORD.unpack_from(self._map, offset)
+        if position == UNREACHABLE:
+            return None
+        return (position or None), score
+
+    def close(self):
+        self._map.close()
+
+
+def load_table(path=DEFAULT_PATH):
+    """Maps the table at ``path``, or returns None if it has not been built."""
+    try:
+        return PerfectPlayTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the perfect-play lookup table.")
+    parser.add_argument('--output', default=DEFAULT_PATH, help="where to write the table")
+    args = parser.parse_args(argv)
+    count = build_table(args.output)
+    print("Solved %d positions into %s" % (count, args.output))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Compact append-only log of played games, and a streaming reader for it.
+
+A log file starts with an 8-byte header and then holds one variable-length
+record per game, appended as the games finish:
+
+    <IBBBBBH   timestamp (unix seconds), rows, cols, win length, mode,
+               outcome, move count
+    moves      the 1-based positions played, X first: one byte each on
+               boards of up to 255 cells, <H each on bigger ones
+    <I * n     AI thinking time in microseconds, one per AI move
+
+The outcome byte holds the winner (0 = draw, 1 = X, 2 = O) plus
+``RESIGNED`` when the game ended early, and ``AI_X``/``AI_O`` when the AI
+played that mark (whose moves then carry a timing). A classic 3x3 game
+against the AI takes about 30 bytes.
+
+Version 1 logs had a one-byte move count and so held only boards of up to
+255 cells. They are still read, and ``GameRecorder`` keeps appending to one
+in that layout.
+
+The reader memory-maps the file and decodes records one at a time, so it
+streams through millions of games without loading them all. A record cut
+short by a crash mid-append is skipped.
+
+    python -m engine.recording games.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+from engine.summary import Outcomes, percentiles
+
+MAGIC = b'TTTR'
+VERSION = 2
+HEADER = struct.Struct('<4sBBH')  # magic, version, reserved, reserved
+RECORD = struct.Struct('<IBBBBBH')  # timestamp, rows, cols, win length, mode, outcome, move count
+# Record layout of each version; version 1 had a one-byte move count
+RECORDS = {1: struct.Struct('<IBBBBBB'), 2: RECORD}
+
+# Boards with more cells than this store each move in two bytes
+BYTE_MOVES_MAX_CELLS = 255
+
+# What kind of game a record comes from
+MODES = ('single_player', 'two_player', 'server_ai', 'server_human', 'simulation')
+
+# Outcome byte: winner in the low two bits, flags above
+WINNERS = (None, 'X', 'O')
+RESIGNED = 0x04
+AI_X = 0x08
+AI_O = 0x10
+
+_MAX_MICROSECONDS = 0xFFFFFFFF
+
+GameRecord = namedtuple('GameRecord',
+                        'timestamp rows cols win_length mode winner resigned ai_mark moves ai_microseconds')
+GameRecord.__doc__ = """One recorded game.
+
+``moves`` holds the 1-based positions, X first: a bytes object, or a tuple
+on boards of more than ``BYTE_MOVES_MAX_CELLS`` cells. ``ai_mark`` is
+the mark the AI played (or None) and ``ai_microseconds`` its thinking time
+for each of its moves, in order.
+"""
+
+_timing_structs = {}
+_wide_move_structs = {}
+
+
+def _timings(count):
+    timings = _timing_structs.get(count)
+    if timings is None:
+        timings = _timing_structs[count] = struct.Struct('<%dI' % count)
+    return timings
+
+
+def _wide_moves(count):
+    moves = _wide_move_structs.get(count)
+    if moves is None:
+        moves = _wide_move_structs[count] = struct.Struct('<%dH' % count)
+    return moves
+
+
+def _ai_move_count(ai_mark, moves):
+    if ai_mark == 'X':
+        return (moves + 1) // 2
+    if ai_mark == 'O':
+        return moves // 2
+    return 0
+
+
+def encode(moves, winner, mode, rows=3, cols=3, win_length=3, ai_mark=None, ai_seconds=(), resigned=False,
+           timestamp=None, version=VERSION):
+    """Returns the bytes of one record; see the module docstring for the layout.
+
+    ``version`` picks the record layout; a version 1 record can't hold a
+    board of more than ``BYTE_MOVES_MAX_CELLS`` cells.
+    """
+    if mode not in MODES:
+        raise ValueError("Unknown mode %r, expected one of %s" % (mode, MODES))
+    if version not in RECORDS:
+        raise ValueError("Unknown log version %r, expected one of %s" % (version, tuple(RECORDS)))
+    wide = rows * cols > BYTE_MOVES_MAX_CELLS
+    if wide and version == 1:
+        raise ValueError("A version 1 log holds boards of at most %d cells, got %dx%d"
+                         % (BYTE_MOVES_MAX_CELLS, rows, cols))
+    if len(moves) > rows * cols:
+        raise ValueError("%d moves don't fit on a %dx%d board" % (len(moves), rows, cols))
+    if len(ai_seconds) != _ai_move_count(ai_mark, len(moves)):
+        raise ValueError("Expected one AI timing per %s move, got %d" % (ai_mark, len(ai_seconds)))
+    outcome = WINNERS.index(winner)
+    if resigned:
+        outcome |= RESIGNED
+    if ai_mark == 'X':
+        outcome |= AI_X
+    elif ai_mark == 'O':
+        outcome |= AI_O
+    if timestamp is None:
+        timestamp = time.time()
+    microseconds = [min(_MAX_MICROSECONDS, max(0, round(seconds * 1e6))) for seconds in ai_seconds]
+    return (RECORDS[version].pack(int(timestamp), rows, cols, win_length, MODES.index(mode), outcome, len(moves))
+            + (_wide_moves(len(moves)).pack(*moves) if wide else bytes(moves))
+            + _timings(len(microseconds)).pack(*microseconds))
+
+
+class GameRecorder:
+    """Appends records to the log at ``path``, creating it if needed.
+
+    Each record goes out in a single write and is flushed right away, so a
+    crash loses at most the game being written. Records are written in the
+    file's own ``version``; raises ValueError if ``path`` is some other file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self.version = VERSION
+            self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+            self._file.flush()
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    self.version = _version(f.read(HEADER.size))
+            except (OSError, ValueError):
+                self._file.close()
+                raise
+
+    def record(self, moves, winner, mode, **fields):
+        """Appends one game; takes the arguments of ``encode``."""
+        self._file.write(encode(moves, winner, mode, version=self.version, **fields))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _version(header):
+    # Returns the version of a log from its header bytes
+    if len(header) == HEADER.size:
+        magic, version, _, _ = HEADER.unpack(header)
+        if magic == MAGIC and version in RECORDS:
+            return version
+    raise ValueError("Not a game log of version %s" % ' or '.join(str(version) for version in RECORDS))
+
+
+def iter_buffer(data):
+    """Yields the ``GameRecord`` objects in a log held in ``data`` (bytes or mmap)."""
+    if len(data) < HEADER.size:
+        return
+    record = RECORDS[_version(data[:HEADER.size])]
+
+    unpack_record = record.unpack_from
+    record_size = record.size
+    # (outcome, move count, wide moves) -> decoded outcome fields, moves struct or None, timing struct
+    layouts = {}
+    end = len(data)
+    offset = HEADER.size
+    while offset + record_size <= end:
+        timestamp, rows, cols, win_length, mode, outcome, count = unpack_record(data, offset)
+        offset += record_size
+        wide = rows * cols > BYTE_MOVES_MAX_CELLS
+        layout = layouts.get((outcome, count, wide))
+        if layout is None:
+            ai_mark = 'X' if outcome & AI_X else 'O' if outcome & AI_O else None
+            layout = layouts[outcome, count, wide] = (WINNERS[outcome & 0x03], bool(outcome & RESIGNED), ai_mark,
+                                                      _wide_moves(count) if wide else None,
+                                                      _timings(_ai_move_count(ai_mark, count)))
+        winner, resigned, ai_mark, wide_moves, timings = layout
+        moves_size = count if wide_moves is None else wide_moves.size
+        if offset + moves_size + timings.size > end:
+            return  # Cut short mid-append
+        if wide_moves is None:
+            moves = data[offset:offset + count]
+        else:
+            moves = wide_moves.unpack_from(data, offset)
+        offset += moves_size
+        ai_microseconds = timings.unpack_from(data, offset)
+        offset += timings.size
+        yield GameRecord(timestamp, rows, cols, win_length, MODES[mode], winner, resigned, ai_mark, moves,
+                         ai_microseconds)
+
+
+def iter_records(path):
+    """Streams every record of the log at ``path`` from a read-only memory map."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from iter_buffer(data)
+
+
+def outcomes_by_opening(records, mode=None):
+    """Returns ``{opening position: Outcomes}``, optionally for one ``mode`` only."""
+    openings = {}
+    for record in records:
+        if not record.moves or (mode is not None and record.mode != mode):
+            continue
+        outcomes = openings.get(record.moves[0])
+        if outcomes is None:
+            outcomes = openings[record.moves[0]] = Outcomes()
+        outcomes.add(record.winner)
+    return openings
+
+
+def outcomes_by_mode(records):
+    """Returns ``{mode: Outcomes}``."""
+    modes = {}
+    for record in records:
+        outcomes = modes.get(record.mode)
+        if outcomes is None:
+            outcomes = modes[record.mode] = Outcomes()
+        outcomes.add(record.winner)
+    return modes
+
+
+def ai_time_percentiles(records, fractions=(0.5, 0.9, 0.99)):
+    """Returns ``{fraction: seconds}`` over every AI move in ``records``, or {} if there are none."""
+    samples = (microseconds for record in records for microseconds in record.ai_microseconds)
+    return {fraction: microseconds / 1e6 for fraction, microseconds in percentiles(samples, fractions).items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a game log.")
+    parser.add_argument('path', help="log written by GameRecorder")
+    parser.add_argument('--mode', choices=MODES, help="only count games of this mode in the opening table")
+    args = parser.parse_args(argv)
+
+    # One streaming pass per summary, so the log is never held in memory
+    start = time.perf_counter()
+    by_mode = outcomes_by_mode(iter_records(args.path))
+    by_opening = outcomes_by_opening(iter_records(args.path), args.mode)
+    ai_seconds = ai_time_percentiles(iter_records(args.path), (0.5, 0.99))
+    games = sum(outcomes.games for outcomes in by_mode.values())
+    print("%d games read in %.2fs" % (games, time.perf_counter() - start))
+
+    for mode, outcomes in sorted(by_mode.items()):
+        print("  %-14s games %8d  X %5.1f%%  O %5.1f%%  draw %5.1f%%" % (
+            (mode, outcomes.games) + tuple(rate * 100 for rate in outcomes.rates())))
+    print("By opening move:")
+    for position, outcomes in sorted(by_opening.items()):
+        print("  %3d  games %8d  X %5.1f%%  O %5.1f%%  draw %5.1f%%" % (
+            (position, outcomes.games) + tuple(rate * 100 for rate in outcomes.rates())))
+    if ai_seconds:
+        print("AI move time  p50 %.3fms  p99 %.3fms" % (ai_seconds[0.5] * 1e3, ai_seconds[0.99] * 1e3))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
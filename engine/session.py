@@ -0,0 +1,236 @@
+"""AI state for a series of games, held in an object instead of globals.
+
+A ``Session`` owns everything the AI remembers between moves: the board
+shape, whether it is still in its (random) first game, which search to run
+and the search caches. Separate sessions never share state, so one process
+can serve many independent players::
+
+    from engine.session import Session
+    session = Session(first_game=False)
+    position = session.ai_move(ai_bits, player_bits)
+
+``game_logic`` keeps one default session for the pygame app.
+"""
+
+import random
+
+from engine import alphabeta, bitboard, instrumentation
+from engine.deepening import IterativeDeepening
+from engine.mcts import MCTS
+from engine.parallel import ParallelSearch
+from engine.transposition import TranspositionTable
+
+# Search used when the perfect-play table can't answer:
+# 'alphabeta' (pruned, same moves), 'minimax' (full search), 'parallel'
+# (alpha-beta on every core, same moves), 'deepening' (heuristic search on a
+# depth/time budget) or 'mcts' (Monte Carlo tree search on a budget, for big
+# boards)
+SEARCH_MODES = ('alphabeta', 'minimax', 'parallel', 'deepening', 'mcts')
+
+# Boards up to this many cells are searched exhaustively by default; alpha-beta
+# takes under a second on 4x4 but minutes on 5x5
+EXHAUSTIVE_MAX_CELLS = 16
+
+# move_scores searches exactly with at most this many free cells, and on a
+# time budget with more
+EXACT_SCORES_MAX_EMPTY = 9
+
+
+def default_search_mode(rows=3, cols=3):
+    """Returns 'alphabeta' for boards small enough to search exhaustively, 'deepening' for bigger ones."""
+    return 'alphabeta' if rows * cols <= EXHAUSTIVE_MAX_CELLS else 'deepening'
+
+
+class Session:
+    """Board shape, search settings and caches for one player's games.
+
+    ``first_game`` makes ``ai_move`` pick random moves until ``end_game`` is
+    called. ``perfect_play_table`` is an optional
+    ``perfect_play.PerfectPlayTable`` consulted on the standard board.
+    ``rng`` supplies the random moves (the ``random`` module by default).
+    ``mcts`` is the ``engine.mcts.MCTS`` used in 'mcts' mode, which sets its
+    budget and worker processes, ``parallel`` the
+    ``engine.parallel.ParallelSearch`` used in 'parallel' mode and
+    ``deepening`` the ``engine.deepening.IterativeDeepening`` used in
+    'deepening' mode; default ones are made on first use. ``score_time`` is
+    the budget in seconds of a ``move_scores`` call that can't search
+    exactly.
+    """
+
+    def __init__(self, rows=3, cols=3, win_length=3, search_mode='alphabeta', first_game=True,
+                 perfect_play_table=None, rng=None, mcts=None, parallel=None, deepening=None, score_time=0.5):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError("Unknown search mode %r, expected one of %s" % (search_mode, SEARCH_MODES))
+        self.geometry = bitboard.get_geometry(rows, cols, win_length)
+        self.search_mode = search_mode
+        self.first_game = first_game
+        self.perfect_play_table = perfect_play_table
+        self.rng = random if rng is None else rng
+        self.mcts = mcts
+        self.parallel = parallel
+        self.deepening = deepening
+        # Separate from ``deepening`` so move_scores can run on another thread than ai_move
+        self.score_search = IterativeDeepening(time_budget=score_time)
+        if mcts is not None:
+            mcts.reset(self.geometry)
+
+        # Search results shared by every search, across moves and games
+        self.transposition_table = TranspositionTable()
+        # Alpha-beta keeps score bounds rather than exact scores, so it gets its own table
+        self.alphabeta_table = TranspositionTable()
+        # move_scores has its own tables so it can run on another thread than ai_move
+        self.evaluation_table = TranspositionTable()
+        self.move_score_cache = TranspositionTable(max_entries=4096)
+
+    def set_board_size(self, rows=3, cols=3, win_length=3):
+        """Switches to a ``rows`` x ``cols`` board where ``win_length`` in a row wins."""
+        self.geometry = bitboard.get_geometry(rows, cols, win_length)
+        # Cached positions belong to the old board shape
+        self.transposition_table.clear()
+        self.alphabeta_table.clear()
+        self.evaluation_table.clear()
+        self.move_score_cache.clear()
+        if self.mcts is not None:
+            self.mcts.reset(self.geometry)
+
+    def end_game(self):
+        """Ends the rigged first game; the AI searches from now on."""
+        self.first_game = False
+
+    def set_difficulty(self, difficulty):
+        """Plays at one of ``engine.deepening.DIFFICULTIES`` from the next move on.
+
+        The level's depth and time budget replace the random first game.
+        """
+        self.deepening = IterativeDeepening.for_difficulty(difficulty)
+        self.search_mode = 'deepening'
+        self.first_game = False
+
+    def score(self, me, opp, stats=None):
+        """Returns the minimax score of the position for the side to move (``me``)."""
+        return bitboard.negamax(me, opp, self.transposition_table, self.geometry, stats)
+
+    def move_scores(self, me, opp):
+        """Returns ``{position: score}`` for every legal move of ``me``.
+
+        Scores are from ``me``'s point of view (see
+        ``alphabeta.move_scores``). With up to ``EXACT_SCORES_MAX_EMPTY``
+        free cells they are exact; with more, the search stops after
+        ``score_time`` seconds and scores between -1 and 1 are heuristic
+        (see ``IterativeDeepening.move_scores``), and moves it didn't reach
+        are missing. Results are cached per position, so asking again about
+        the same board is a dict lookup; treat the returned dict as
+        read-only.
+        """
+        key = me << self.geometry.cells | opp
+        scores = self.move_score_cache.get(key)
+        if scores is None:
+            if bitboard.popcount(self.geometry.full & ~(me | opp)) <= EXACT_SCORES_MAX_EMPTY:
+                scores = alphabeta.move_scores(me, opp, self.evaluation_table, self.geometry)
+            else:
+                scores = self.score_search.move_scores(me, opp, self.geometry)
+                if self.score_search.stopped:
+                    return scores  # Cut short by stop_move_scores; don't keep the partial scores
+            self.move_score_cache.store(key, scores)
+        return scores
+
+    def stop_move_scores(self):
+        """Makes a ``move_scores`` call running on another thread return the scores found so far.
+
+        Only the time-budgeted search stops early; an exact one is quick.
+        """
+        self.score_search.stop()
+
+    def stop_ai_move(self):
+        """Makes an ``ai_move`` call running on another thread return its best move so far.
+
+        Only the 'deepening' and 'mcts' searches stop early; the exhaustive
+        ones run to the end.
+        """
+        if self.deepening is not None:
+            self.deepening.stop()
+        if self.mcts is not None:
+            self.mcts.stop()
+
+    def lookup_move(self, ai_bits, player_bits, ai_is_x=None):
+        """Returns the perfect-play table's move for the AI, or None if it has none.
+
+        The table covers the 3x3 board with X moving first, so it can only
+        answer when ``ai_is_x`` is given and it is the AI's turn. A lookup
+        costs a few microseconds, unlike a search.
+        """
+        if self.perfect_play_table is None or self.geometry is not bitboard.STANDARD or ai_is_x is None:
+            return None
+        x_bits, o_bits = (ai_bits, player_bits) if ai_is_x else (player_bits, ai_bits)
+        if (bitboard.popcount(x_bits) == bitboard.popcount(o_bits)) != ai_is_x:
+            return None
+        entry = self.perfect_play_table.lookup(x_bits, o_bits)
+        return None if entry is None else entry[0]
+
+    def ai_move(self, ai_bits, player_bits, ai_is_x=None):
+        """Returns the 1-based position the AI plays, or None on a full board.
+
+        ``ai_is_x`` says whether the AI plays X; pass it to let the
+        perfect-play table answer on the standard board.
+        """
+        geometry = self.geometry
+        empty = geometry.full & ~(ai_bits | player_bits)
+        if not empty:
+            return None
+
+        # In the first game the AI plays randomly
+        if self.first_game:
+            stats = instrumentation.start_search('random')
+            move = self.rng.choice(bitboard.move_positions(empty))
+            if stats is not None:
+                instrumentation.finish_search(stats, move)
+            return move
+
+        # Collect search statistics only if instrumentation hooks are registered
+        stats = instrumentation.start_search(self.search_mode, bitboard.popcount(ai_bits | player_bits))
+
+        # After the first game, look the move up in the perfect-play table when the
+        # position is one it covers, unless a budget is meant to limit the AI
+        move = None if self.search_mode == 'deepening' else self.lookup_move(ai_bits, player_bits, ai_is_x)
+        if move is not None:
+            if stats is not None:
+                stats.source = 'perfect_play'
+                instrumentation.finish_search(stats, move)
+            return move
+
+        if self.search_mode == 'mcts':
+            if self.mcts is None:
+                self.mcts = MCTS(geometry)
+            result = self.mcts.search(ai_bits, player_bits, stats=stats)  # Nodes are iterations
+            if stats is not None:
+                instrumentation.finish_search(stats, result.position)
+            return result.position
+
+        if self.search_mode == 'deepening':
+            if self.deepening is None:
+                self.deepening = IterativeDeepening()
+            move, _ = self.deepening.best_move(ai_bits, player_bits, geometry, stats)
+            if stats is not None:
+                instrumentation.finish_search(stats, move)
+            return move
+
+        # Otherwise use the unbeatable AI strategy with a search
+        if self.search_mode == 'alphabeta':
+            table = self.alphabeta_table
+            search = alphabeta.best_move
+        elif self.search_mode == 'minimax':
+            table = self.transposition_table
+            search = bitboard.best_move
+        elif self.search_mode == 'parallel':
+            if self.parallel is None:
+                self.parallel = ParallelSearch()
+            table = self.alphabeta_table
+            search = self.parallel.best_move
+        else:
+            raise ValueError("Unknown search mode %r, expected one of %s" % (self.search_mode, SEARCH_MODES))
+        table_counts = (table.hits, table.misses)
+        best_move, _ = search(ai_bits, player_bits, table, geometry, stats)
+
+        if stats is not None:
+            instrumentation.finish_search(stats, best_move, table, table_counts)
+        return best_move
@@ -0,0 +1,39 @@
+"""Summary statistics shared by the game log, the game tree, the benchmarks and the load client."""
+
+
+def percentiles(samples, fractions=(0.5, 0.9, 0.99)):
+    """Returns ``{fraction: sample}`` for each fraction (0-1) of ``samples``, or {} if there are none.
+
+    Each value is the sample at that rank in sorted order, so 1.0 gives the
+    largest sample.
+    """
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    last = len(samples) - 1
+    return {fraction: samples[min(last, int(fraction * len(samples)))] for fraction in fractions}
+
+
+class Outcomes:
+    """Win/draw counts for a set of games."""
+
+    def __init__(self):
+        self.games = 0
+        self.x_wins = 0
+        self.o_wins = 0
+        self.draws = 0
+
+    def add(self, winner):
+        self.games += 1
+        if winner == 'X':
+            self.x_wins += 1
+        elif winner == 'O':
+            self.o_wins += 1
+        else:
+            self.draws += 1
+
+    def rates(self):
+        """Returns ``(x_win_rate, o_win_rate, draw_rate)``."""
+        if not self.games:
+            return 0.0, 0.0, 0.0
+        return self.x_wins / self.games, self.o_wins / self.games, self.draws / self.games
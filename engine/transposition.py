@@ -0,0 +1,65 @@
+"""Bounded transposition table for the bitboard search."""
+
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1 << 16
+
+
+class TranspositionTable:
+    """Maps canonical position keys to search scores.
+
+    Keys come from ``bitboard.canonical_key`` so the 8 rotations and
+    reflections of a position share one entry. Once ``max_entries`` is
+    reached the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the stored score for ``key``, or None on a miss."""
+        score = self._entries.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def store(self, key, score):
+        """Stores ``score`` under ``key``, evicting the oldest entry if full."""
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+        elif len(entries) >= self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        entries[key] = score
+
+    def clear(self):
+        """Drops every entry and resets the statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """Returns a dict of size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
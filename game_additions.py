@@ -1,5 +1,6 @@
 import pygame
-import random
+
+from particles import Confetti
 
 def play_sound(sound, loop=False, volume=1.0):
     """Plays a given sound. If loop is True, loops the sound indefinitely. Adjust volume."""
@@ -23,60 +24,129 @@ def stop_sound(sound):
     elif sound == "music":
         pygame.mixer.music.stop()  # Stop background music
 
-def init_sounds():
-    """Initializes and returns all necessary sounds."""
-    win_sound = pygame.mixer.Sound('win_sound.wav')
-    click_sound = pygame.mixer.Sound('click_sound.wav')
-    draw_sound = pygame.mixer.Sound('draw_sound.wav')
-    soundtrack = pygame.mixer.Sound('soundtrack.wav')  # Ensure it's a .wav if using Sound
+def init_sounds(assets):
+    """Returns the preloaded sounds from an ``AssetManager``.
+
+    Missing sounds come back as None, which play_sound and stop_sound ignore.
+    The soundtrack is streamed, so it is returned as "music".
+    """
+    win_sound = assets.sound('win')
+    click_sound = assets.sound('click')
+    draw_sound = assets.sound('draw')
+    soundtrack = "music" if assets.has_music else None
 
     return win_sound, click_sound, draw_sound, soundtrack
 
-def win_animation(screen, winner_text_top, winner_text_bottom, WIDTH, HEIGHT, confetti_stop=False):
-    # Define colors for confetti
-    confetti_colors = [pygame.Color(255, 0, 0), pygame.Color(0, 0, 255), pygame.Color(0, 255, 0),
-                       pygame.Color(255, 255, 0), pygame.Color(255, 165, 0)]  # Red, Blue, Green, Yellow, Orange
+class WinAnimation:
+    """Winner screen with falling confetti, advanced one frame at a time.
 
-    # Define the font for the winner text
-    winner_font_size = int(HEIGHT * 0.1)  # 10% of the screen height
-    winner_font = pygame.font.Font(None, winner_font_size)
+    Call ``update(dt)`` and ``draw()`` once per frame from the game loop until
+    ``done``. Confetti falls for ``duration`` seconds, then the last frame is
+    held for ``hold`` seconds. Pass an already loaded ``font`` to skip
+    loading pygame's default font.
+    """
 
-    # Run the animation for a few seconds
-    start_time = pygame.time.get_ticks()  # Track time to stop after a few seconds
-    confetti_duration = 3000  # Confetti duration (in milliseconds)
-    while pygame.time.get_ticks() - start_time < confetti_duration:  # Run for 3 seconds
-        screen.fill(pygame.Color(50, 50, 50))  # Dark background
+    def __init__(self, screen, winner_text_top, winner_text_bottom, WIDTH, HEIGHT, confetti_stop=False,
+                 duration=3.0, hold=3.0, particles=3000, font=None):
+        self.screen = screen
+        self.WIDTH = WIDTH
+        self.HEIGHT = HEIGHT
+        self.duration = duration
+        self.hold = hold
+        self.elapsed = 0.0
+        self.confetti = None if confetti_stop else Confetti(WIDTH, HEIGHT, particles)
+
+        # Render both lines once; white text, 10% of the screen height by default
+        winner_font = font or pygame.font.Font(None, int(HEIGHT * 0.1))
+        self.winner_message_top = winner_font.render(winner_text_top, True, pygame.Color(255, 255, 255))
+        self.winner_message_bottom = winner_font.render(winner_text_bottom, True, pygame.Color(255, 255, 255))
+        self._drawn_final_frame = False
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration + self.hold
+
+    @property
+    def animating(self):
+        """True while the confetti is still moving."""
+        return self.elapsed < self.duration
 
-        # Render both lines separately
-        winner_message_top = winner_font.render(winner_text_top, True, pygame.Color(255, 255, 255))  # White text
-        winner_message_bottom = winner_font.render(winner_text_bottom, True, pygame.Color(255, 255, 255))
+    @property
+    def time_left(self):
+        """Seconds until ``done``."""
+        return self.duration + self.hold - self.elapsed
+
+    def update(self, dt):
+        """Advances the animation by ``dt`` seconds."""
+        if self.confetti is not None and self.animating:
+            self.confetti.update(min(dt, self.duration - self.elapsed))
+        self.elapsed += dt
+
+    def draw(self):
+        """Draws the current frame and returns True if the screen changed."""
+        if not self.animating:
+            if self._drawn_final_frame:
+                return False  # The held frame is already on screen
+            self._drawn_final_frame = True
+
+        screen, WIDTH, HEIGHT = self.screen, self.WIDTH, self.HEIGHT
+        screen.fill(pygame.Color(50, 50, 50))  # Dark background
 
         # Display the first line ("WINNER") at the center of the screen
-        screen.blit(winner_message_top, (
-            WIDTH // 2 - winner_message_top.get_width() // 2, HEIGHT // 3 - winner_message_top.get_height() // 2))
+        top, bottom = self.winner_message_top, self.winner_message_bottom
+        screen.blit(top, (WIDTH // 2 - top.get_width() // 2, HEIGHT // 3 - top.get_height() // 2))
 
         # Display the second line (e.g., "PLAYER 1" or "AI") below the first line
-        screen.blit(winner_message_bottom, (
-            WIDTH // 2 - winner_message_bottom.get_width() // 2, HEIGHT // 3 + winner_message_top.get_height()))
-
-        # Simulate falling confetti only if confetti_stop is False
-        if not confetti_stop:
-            for _ in range(100):  # 100 confetti pieces per frame
-                confetti_x = random.randint(0, WIDTH)
-                confetti_y = random.randint(0, HEIGHT)
-                confetti_color = random.choice(confetti_colors)
-                confetti_size = random.randint(5, 10)
-                pygame.draw.rect(screen, confetti_color, (confetti_x, confetti_y, confetti_size, confetti_size))
-
-        pygame.display.update()  # Update the screen
-        pygame.time.delay(100)  # Delay to control the speed of the animation
-
-def draw_screen_animation(screen, WIDTH, HEIGHT):
-    """Draws a simple draw animation on the screen."""
-    animation_font = pygame.font.Font(None, int(HEIGHT * 0.1))
-    draw_text = animation_font.render("DRAW!", True, pygame.Color(255, 255, 255))
-    screen.blit(draw_text, (
-        WIDTH // 2 - draw_text.get_width() // 2,
-        HEIGHT // 2 - draw_text.get_height() // 2))
-    pygame.display.update()
-    pygame.time.delay(2000)  # Display for 2 seconds
+        screen.blit(bottom, (WIDTH // 2 - bottom.get_width() // 2, HEIGHT // 3 + top.get_height()))
+
+        if self.confetti is not None:
+            self.confetti.draw(screen)
+        return True
+
+
+class DrawAnimation:
+    """"DRAW!" shown over the current screen for ``duration`` seconds."""
+
+    def __init__(self, screen, WIDTH, HEIGHT, duration=2.0, font=None):
+        self.screen = screen
+        self.duration = duration
+        self.elapsed = 0.0
+        animation_font = font or pygame.font.Font(None, int(HEIGHT * 0.1))
+        self.draw_text = animation_font.render("DRAW!", True, pygame.Color(255, 255, 255))
+        self.position = (WIDTH // 2 - self.draw_text.get_width() // 2, HEIGHT // 2 - self.draw_text.get_height() // 2)
+        self._drawn = False
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration
+
+    @property
+    def animating(self):
+        """True until the text is on screen; after that nothing changes."""
+        return not self._drawn
+
+    @property
+    def time_left(self):
+        """Seconds until ``done``."""
+        return self.duration - self.elapsed
+
+    def update(self, dt):
+        self.elapsed += dt
+
+    def draw(self):
+        """Draws the text the first time; returns True if the screen changed."""
+        if self._drawn:
+            return False
+        self._drawn = True
+        self.screen.blit(self.draw_text, self.position)
+        return True
+
+
+def win_animation(screen, winner_text_top, winner_text_bottom, WIDTH, HEIGHT, confetti_stop=False, font=None):
+    """Starts the winner screen; drive the returned ``WinAnimation`` from the game loop."""
+    return WinAnimation(screen, winner_text_top, winner_text_bottom, WIDTH, HEIGHT, confetti_stop, font=font)
+
+
+def draw_screen_animation(screen, WIDTH, HEIGHT, font=None):
+    """Starts the draw screen; drive the returned ``DrawAnimation`` from the game loop."""
+    return DrawAnimation(screen, WIDTH, HEIGHT, font=font)
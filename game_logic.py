@@ -1,20 +1,61 @@
-import random
+import sys
+import types
+from functools import lru_cache
+
+from engine import bitboard, instrumentation, perfect_play
+from engine.deepening import IterativeDeepening
+from engine.mcts import MCTS
+from engine.session import SEARCH_MODES, Session
+
+# The AI's state (first-game rigging, search mode, board shape and caches)
+# lives in this session; see engine.session for running several side by side
+session = Session(perfect_play_table=perfect_play.load_table())
+
+# Names that used to be module globals, still readable from here but read-only:
+# assigning one would only hide the session's value, so it raises instead.
+# Change them with set_first_game, set_search_mode and set_board_size.
+_SESSION_ATTRIBUTES = {
+    'is_first_game': 'first_game',
+    'search_mode': 'search_mode',
+    'board_geometry': 'geometry',
+    'transposition_table': 'transposition_table',
+    'alphabeta_table': 'alphabeta_table',
+    'perfect_play_table': 'perfect_play_table',
+}
+
+
+def __getattr__(name):
+    if name in _SESSION_ATTRIBUTES:
+        return getattr(session, _SESSION_ATTRIBUTES[name])
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+class _GameLogicModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        if name in _SESSION_ATTRIBUTES:
+            raise AttributeError("game_logic.%s is read-only; use the game_logic setters or game_logic.session"
+                                 % name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _GameLogicModule
+
 
 # Use nested loops to create the board
 def create_board():
     board = []  # Initialize the board
-    for i in range(3):  # Outer loop for rows
+    for i in range(session.geometry.rows):  # Outer loop for rows
         row = []  # Start with an empty row
-        for j in range(3):  # Inner loop for columns
-            row.append(str(i * 3 + j + 1))  # Fill the row with values (1 to 9)
+        for j in range(session.geometry.cols):  # Inner loop for columns
+            row.append(str(i * session.geometry.cols + j + 1))  # Fill the row with values (1 to rows * cols)
         board.append(row)  # Add the filled row to the board
     return board
 
 
 # Allows user to place a mark on the board with an X or O
 def place_mark(board, mark, position):
-    row = (position - 1) // 3
-    col = (position - 1) % 3
+    row = (position - 1) // session.geometry.cols
+    col = (position - 1) % session.geometry.cols
 
     if board[row][col] in ['X', 'O']:
         return False
@@ -23,136 +64,140 @@ def place_mark(board, mark, position):
     return True
 
 
-# Check for wins
-def check_win(board, mark):
-    # Check rows
-    for row in board:
-        if all(cell == mark for cell in row):
-            return True
-
-    # Check columns
-    for col in range(3):
-        if all(board[row][col] == mark for row in range(3)):
-            return True
+# (row, col) cells of every win line through a cell, for reading them straight off a board
+@lru_cache(maxsize=None)
+def _line_cells(geometry, cell):
+    return tuple(tuple(divmod(line_cell.bit_length() - 1, geometry.cols) for line_cell in bitboard.iter_moves(mask))
+                 for mask in geometry.lines_through[cell])
 
-    # Check diagonals
-    if all(board[i][i] == mark for i in range(3)):
-        return True
-    if all(board[i][2 - i] == mark for i in range(3)):
-        return True
 
-    return False
+# Check for wins
+# Pass the position just played as last_position to only read the lines through it,
+# so the check costs the same on any board size
+def check_win(board, mark, last_position=None):
+    if last_position is not None:
+        for line in _line_cells(session.geometry, last_position - 1):
+            for row, col in line:
+                if board[row][col] != mark:
+                    break
+            else:
+                return True
+        return False
+    return session.geometry.has_won(bitboard.marks_to_bits(board, mark))
 
 
 # Check for a draw
 def is_draw(board):
-    return all(cell in ['X', 'O'] for row in board for cell in row)
+    return bitboard.occupied_bits(board) == session.geometry.full
 
 
 # Find a winning move for the AI
 def find_winning_move(board, mark):
-    for position in range(1, 10):  # Loop through all positions 1 to 9
-        row = (position - 1) // 3
-        col = (position - 1) % 3
-
-        if board[row][col] not in ['X', 'O']:  # Check if the cell is empty
-            board[row][col] = mark  # Temporarily place the mark
-            if check_win(board, mark):
-                board[row][col] = str(position)  # Undo the move
-                return position
-            board[row][col] = str(position)  # Undo the move
-
-    return None  # No winning move found
+    move = bitboard.winning_bit(bitboard.marks_to_bits(board, mark), bitboard.occupied_bits(board),
+                                session.geometry)
+    return bitboard.bit_position(move) if move else None  # None if no winning move found
 
 
 # Check if AI needs to block the player's winning move
 def find_blocking_move(board, player_mark):
-    for position in range(1, 10):  # Loop through all positions 1 to 9
-        row = (position - 1) // 3
-        col = (position - 1) % 3
-
-        if board[row][col] not in ['X', 'O']:  # Check if the cell is empty
-            board[row][col] = player_mark  # Temporarily place the opponent's mark
-            if check_win(board, player_mark):
-                board[row][col] = str(position)  # Undo the move
-                return position
-            board[row][col] = str(position)  # Undo the move
-
-    return None  # No blocking move needed
+    move = bitboard.winning_bit(bitboard.marks_to_bits(board, player_mark), bitboard.occupied_bits(board),
+                                session.geometry)
+    return bitboard.bit_position(move) if move else None  # None if no blocking move needed
 
 
 # Function to check for available spots
 def available_spots(board):
-    return [i for i in range(1, 10) if board[(i - 1) // 3][(i - 1) % 3] not in ['X', 'O']]
+    return bitboard.move_positions(session.geometry.full & ~bitboard.occupied_bits(board))
+
+
+# Switch to a rows x cols board where win_length marks in a row win
+# Boards made by create_board afterwards have the new shape
+def set_board_size(rows=3, cols=3, win_length=3):
+    session.set_board_size(rows, cols, win_length)
+
+
+# Pick the AI's search (see engine.session.SEARCH_MODES); 'mcts' thinks for
+# think_time seconds per move, whatever the board size
+def set_search_mode(mode, think_time=1.0):
+    if mode not in SEARCH_MODES:
+        raise ValueError("Unknown search mode %r, expected one of %s" % (mode, SEARCH_MODES))
+    session.search_mode = mode
+    if mode == 'mcts':
+        session.mcts = MCTS(session.geometry, time_budget=think_time)
+    elif mode == 'deepening':
+        session.deepening = IterativeDeepening(time_budget=think_time)
+
 
+# Turn the AI's random first game on or off
+def set_first_game(first_game):
+    session.first_game = first_game
 
-# Global variable to track if it's the first game
-is_first_game = True
+
+# Play at a difficulty from engine.deepening.DIFFICULTIES instead of rigging
+# the first game
+def set_difficulty(difficulty):
+    session.set_difficulty(difficulty)
 
 
 # Minimax algorithm to find the best move for AI
+# The search itself runs on integer bitboards; scores are the same as a plain
+# minimax that returns W - depth for AI wins and depth - W for player wins,
+# where W is one more than the number of cells (10 on a 3x3 board).
 def minimax(board, depth, is_maximizing, ai_mark, player_mark):
-    # Base cases: check for a winner or draw
-    if check_win(board, ai_mark):
-        return 10 - depth
-    elif check_win(board, player_mark):
-        return depth - 10
-    elif is_draw(board):
-        return 0
-
-    # Maximizing player (AI's turn)
+    ai_bits = bitboard.marks_to_bits(board, ai_mark)
+    player_bits = bitboard.marks_to_bits(board, player_mark)
+
+    # Collect search statistics only if instrumentation hooks are registered
+    stats = instrumentation.start_search('minimax', bitboard.popcount(ai_bits | player_bits))
+    table = session.transposition_table
+    table_counts = (table.hits, table.misses)
+
     if is_maximizing:
-        best_score = -float('inf')
-        for move in available_spots(board):
-            row, col = (move - 1) // 3, (move - 1) % 3
-            board[row][col] = ai_mark  # AI makes a move
-            score = minimax(board, depth + 1, False, ai_mark, player_mark)  # Recursively call minimax
-            board[row][col] = str(move)  # Undo the move
-            best_score = max(score, best_score)
-        return best_score
-
-    # Minimizing player (Player's turn)
+        score = session.score(ai_bits, player_bits, stats)  # AI to move
     else:
-        best_score = float('inf')
-        for move in available_spots(board):
-            row, col = (move - 1) // 3, (move - 1) % 3
-            board[row][col] = player_mark  # Player makes a move
-            score = minimax(board, depth + 1, True, ai_mark, player_mark)  # Recursively call minimax
-            board[row][col] = str(move)  # Undo the move
-            best_score = min(score, best_score)
-        return best_score
+        score = -session.score(player_bits, ai_bits, stats)  # Player to move
+
+    if stats is not None:
+        instrumentation.finish_search(stats, table=table, table_counts=table_counts)
+
+    # Account for the plies already played before this position
+    if score > 0:
+        return score - depth
+    elif score < 0:
+        return score + depth
+    return 0
 
 
 # AI move function with first game rigging
 def ai_smart_move(board, player_mark, ai_mark):
-    global is_first_game  # Access the global variable
+    ai_bits = bitboard.marks_to_bits(board, ai_mark)
+    player_bits = bitboard.marks_to_bits(board, player_mark)
+    # The perfect-play table only knows boards marked with X and O
+    ai_is_x = ai_mark == 'X' if {ai_mark, player_mark} == {'X', 'O'} else None
+    return session.ai_move(ai_bits, player_bits, ai_is_x)
+
 
-    # If it's the first game, the AI plays randomly
-    if is_first_game:
-        available_positions = available_spots(board)
-        return random.choice(available_positions)  # AI makes a random move in the first game
+# Scores every legal move for ai_mark, e.g. for move hints
+# Returns {position: score}; positive scores win for ai_mark, higher is quicker
+# On big boards the search is time-limited: scores between -1 and 1 are only a
+# guess, and moves far from every mark may be missing
+# Cached per position, so asking about the same board again is free
+def move_scores(board, player_mark, ai_mark):
+    ai_bits = bitboard.marks_to_bits(board, ai_mark)
+    player_bits = bitboard.marks_to_bits(board, player_mark)
+    return session.move_scores(ai_bits, player_bits)
 
-    # After the first game, use the unbeatable AI strategy with minimax
-    best_score = -float('inf')
-    best_move = None
 
-    # Loop through available spots to find the best move
-    for move in available_spots(board):
-        row, col = (move - 1) // 3, (move - 1) % 3
-        board[row][col] = ai_mark  # AI makes a tentative move
-        score = minimax(board, 0, False, ai_mark, player_mark)  # Call minimax for evaluation
-        board[row][col] = str(move)  # Undo the move
+# Make an ai_smart_move or move_scores running on another thread return early
+# with what it has found so far (only the time-budgeted searches can stop)
+def stop_ai_move():
+    session.stop_ai_move()
 
-        # Find the move with the highest score
-        if score > best_score:
-            best_score = score
-            best_move = move
 
-    return best_move
+def stop_move_scores():
+    session.stop_move_scores()
 
 
 # Function to reset the game and switch to unbeatable AI after the first game
 def end_game_logic():
-    global is_first_game
-    is_first_game = False  # Disable the rigged AI after the first game
-
+    session.end_game()  # Disable the rigged AI after the first game
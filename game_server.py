@@ -0,0 +1,317 @@
+"""asyncio server hosting many Tic Tac Toe matches at once.
+
+Clients connect over TCP (or a Unix socket) and exchange one JSON object
+per line. Every match keeps its own board and is played on the
+``game_logic`` rules. AI moves the perfect-play table can answer are looked
+up on the spot; searches run in a process pool so they never stall the
+event loop.
+
+    python game_server.py --port 8765
+    python game_server.py --unix /tmp/tictactoe.sock
+
+Requests (client to server):
+    {"op": "new", "opponent": "ai", "mark": "X"}   play the AI; X moves first
+    {"op": "new", "opponent": "human"}             wait for another player
+    {"op": "move", "position": 5}                  1-based cell, as in game_logic
+    {"op": "resign"}                               give up the current match
+
+Events (server to client):
+    {"event": "waiting"}                           queued for a human opponent
+    {"event": "started", "match": 7, "mark": "X", "board": ".........", "turn": "X"}
+    {"event": "moved", "mark": "X", "position": 5, "board": "....X....", "turn": "O"}
+    {"event": "over", "winner": "X", "board": "...", "reason": "win"}
+    {"event": "error", "message": "..."}
+
+Boards are sent row by row with ``.`` for empty cells; ``turn`` is null
+once the move ended the match. The AI plays its
+best move from the first game on (no first-game rigging). A client that
+disconnects resigns its match. With ``--record PATH`` every finished match
+is appended to a game log (see ``engine.recording``).
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+
+import game_logic
+from engine import bitboard
+from engine.recording import GameRecorder
+
+logger = logging.getLogger(__name__)
+
+MARKS = ('X', 'O')
+
+
+def _other(mark):
+    return 'O' if mark == 'X' else 'X'
+
+
+def _init_ai_worker(rows, cols, win_length):
+    # The server's AI always searches; no random first game
+    game_logic.set_first_game(False)
+    game_logic.set_board_size(rows, cols, win_length)
+
+
+def _ai_move(board, player_mark, ai_mark):
+    # Runs in an executor worker
+    return game_logic.ai_smart_move(board, player_mark, ai_mark)
+
+
+class Match:
+    """One game: its board, whose turn it is and who plays each mark.
+
+    ``players`` maps each mark to the ``Connection`` playing it, or None for
+    the AI.
+    """
+
+    def __init__(self, match_id, players):
+        self.match_id = match_id
+        self.players = players
+        self.board = game_logic.create_board()
+        self.turn = 'X'
+        self.winner = None
+        self.over = False
+        self.moves = []  # Positions played, X first
+        self.ai_seconds = []  # Time taken by each AI move
+
+    def board_text(self):
+        return ''.join(cell if cell in MARKS else '.' for row in self.board for cell in row)
+
+    def play(self, mark, position):
+        """Places ``mark`` at ``position``; raises ValueError for an illegal move."""
+        if self.over:
+            raise ValueError("The match is over")
+        if mark != self.turn:
+            raise ValueError("It is %s's turn" % self.turn)
+        if not isinstance(position, int) or not 1 <= position <= len(self.board) * len(self.board[0]):
+            raise ValueError("Position must be a cell number, got %r" % (position,))
+        if not game_logic.place_mark(self.board, mark, position):
+            raise ValueError("Cell %d is taken" % position)
+        self.moves.append(position)
+        if game_logic.check_win(self.board, mark, position):
+            self.over = True
+            self.winner = mark
+        elif game_logic.is_draw(self.board):
+            self.over = True
+        else:
+            self.turn = _other(mark)
+
+
+class Connection:
+    """A connected client and the match it is in, if any."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.match = None
+        self.mark = None
+
+    def send(self, **message):
+        # Buffered; GameServer drains the writer after handling each request
+        self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+
+class GameServer:
+    """Hosts matches for every connected client.
+
+    ``executor`` runs the AI's moves; any ``concurrent.futures`` executor
+    works, a process pool keeps searches off the event loop's core. Pass an
+    ``engine.recording.GameRecorder`` as ``recorder`` to log every match.
+    """
+
+    def __init__(self, executor, recorder=None):
+        self.executor = executor
+        self.recorder = recorder
+        self.matches = {}
+        self.waiting = None  # Connection queued for a human opponent
+        self.finished = 0
+        self._match_ids = itertools.count(1)
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Expected a JSON object")
+                    await self.handle_request(connection, request)
+                except ValueError as e:  # Bad JSON or an illegal request
+                    connection.send(event='error', message=str(e))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(connection)
+            writer.close()
+
+    async def handle_request(self, connection, request):
+        op = request.get('op')
+        if op == 'new':
+            await self.new_match(connection, request.get('opponent', 'ai'), request.get('mark', 'X'))
+        elif op == 'move':
+            await self.move(connection, request.get('position'))
+        elif op == 'resign':
+            if connection.match is None:
+                raise ValueError("Not in a match")
+            self.resign(connection)
+        else:
+            raise ValueError("Unknown op %r" % (op,))
+
+    async def new_match(self, connection, opponent, mark):
+        if connection.match is not None and not connection.match.over:
+            raise ValueError("Already in a match; resign it first")
+        if self.waiting is connection:
+            raise ValueError("Already waiting for an opponent")
+        if mark not in MARKS:
+            raise ValueError("Mark must be X or O, got %r" % (mark,))
+
+        if opponent == 'ai':
+            self._start(Match(next(self._match_ids), {mark: connection, _other(mark): None}))
+            if mark == 'O':
+                await self._ai_turn(connection.match)
+        elif opponent == 'human':
+            if self.waiting is None:
+                self.waiting = connection
+                connection.send(event='waiting')
+                return
+            first, self.waiting = self.waiting, None
+            self._start(Match(next(self._match_ids), {'X': first, 'O': connection}))
+            # The first player's events go out on its own connection
+            await first.writer.drain()
+        else:
+            raise ValueError("Opponent must be 'ai' or 'human', got %r" % (opponent,))
+
+    def _start(self, match):
+        self.matches[match.match_id] = match
+        for mark, player in match.players.items():
+            if player is not None:
+                player.match, player.mark = match, mark
+                player.send(event='started', match=match.match_id, mark=mark, board=match.board_text(),
+                            turn=match.turn)
+
+    async def move(self, connection, position):
+        match = connection.match
+        if match is None:
+            raise ValueError("Not in a match")
+        match.play(connection.mark, position)
+        self._broadcast_move(match, connection.mark, position)
+        opponent = match.players[_other(connection.mark)]
+        if opponent is None:
+            await self._ai_turn(match)
+        else:
+            await opponent.writer.drain()
+
+    async def _ai_turn(self, match):
+        if match.over:
+            return
+        ai_mark = match.turn
+        # Table lookups are cheap enough to answer on the loop; searches are not
+        start = time.perf_counter()
+        ai_bits = bitboard.marks_to_bits(match.board, ai_mark)
+        player_bits = bitboard.marks_to_bits(match.board, _other(ai_mark))
+        position = game_logic.session.lookup_move(ai_bits, player_bits, ai_mark == 'X')
+        if position is None:
+            board = [row[:] for row in match.board]
+            loop = asyncio.get_running_loop()
+            position = await loop.run_in_executor(self.executor, _ai_move, board, _other(ai_mark), ai_mark)
+            if match.over:
+                return  # The player resigned or left while the AI was thinking
+        match.ai_seconds.append(time.perf_counter() - start)
+        match.play(ai_mark, position)
+        self._broadcast_move(match, ai_mark, position)
+
+    def _broadcast_move(self, match, mark, position):
+        for player in match.players.values():
+            if player is not None:
+                player.send(event='moved', mark=mark, position=position, board=match.board_text(),
+                            turn=None if match.over else match.turn)
+        if match.over:
+            self._finish(match, match.winner, 'win' if match.winner else 'draw')
+
+    def resign(self, connection):
+        match = connection.match
+        if match.over:
+            raise ValueError("The match is over")
+        match.over = True
+        match.winner = _other(connection.mark)
+        self._finish(match, match.winner, 'resigned')
+
+    def _finish(self, match, winner, reason):
+        self.matches.pop(match.match_id, None)
+        self.finished += 1
+        for player in match.players.values():
+            if player is not None:
+                player.send(event='over', winner=winner, board=match.board_text(), reason=reason)
+        if self.recorder is not None:
+            self._record(match, reason == 'resigned')
+
+    def _record(self, match, resigned):
+        ai_marks = [mark for mark, player in match.players.items() if player is None]
+        geometry = game_logic.session.geometry
+        try:
+            self.recorder.record(match.moves, match.winner, 'server_ai' if ai_marks else 'server_human',
+                                 rows=geometry.rows, cols=geometry.cols, win_length=geometry.k,
+                                 ai_mark=ai_marks[0] if ai_marks else None, ai_seconds=match.ai_seconds,
+                                 resigned=resigned)
+        except (OSError, ValueError) as e:  # A lost record must never reach the players
+            logger.warning("Couldn't record match %d: %s", match.match_id, e)
+
+    def disconnect(self, connection):
+        if self.waiting is connection:
+            self.waiting = None
+        match = connection.match
+        if match is not None and not match.over:
+            self.resign(connection)
+
+
+async def serve(host='127.0.0.1', port=8765, unix_path=None, executor=None, recorder=None):
+    """Runs the server until cancelled."""
+    server = GameServer(executor, recorder)
+    if unix_path is not None:
+        listener = await asyncio.start_unix_server(server.handle_client, unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+    for sock in listener.sockets:
+        logger.info("Serving on %s", sock.getsockname())
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host Tic Tac Toe matches over a line-based JSON protocol.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port to listen on")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--ai-processes', type=int, default=os.cpu_count(), help="processes computing AI moves")
+    parser.add_argument('--rows', type=int, default=3, help="number of board rows")
+    parser.add_argument('--cols', type=int, default=3, help="number of board columns")
+    parser.add_argument('--win-length', type=int, default=3, help="marks in a row needed to win")
+    parser.add_argument('--record', metavar='PATH', help="append every finished match to this game log")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    recorder = GameRecorder(args.record) if args.record else None
+
+    _init_ai_worker(args.rows, args.cols, args.win_length)
+    with concurrent.futures.ProcessPoolExecutor(args.ai_processes, initializer=_init_ai_worker,
+                                                initargs=(args.rows, args.cols, args.win_length)) as executor:
+        try:
+            asyncio.run(serve(args.host, args.port, args.unix, executor, recorder))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if recorder is not None:
+                recorder.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
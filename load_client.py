@@ -0,0 +1,146 @@
+"""Load generator for game_server.py.
+
+Opens many concurrent connections that each play random legal moves, match
+after match, and reports matches per second and move latency percentiles.
+
+    python game_server.py &
+    python load_client.py --matches 20000 --concurrency 1000 --opponent ai
+
+Latencies are measured per move: ``move`` is the time from sending a move
+to the server confirming it, ``ai reply`` (against the AI) the time until
+the AI's answer arrives.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from engine.summary import percentiles
+
+_FRACTIONS = (0.5, 0.9, 0.99, 1.0)
+
+
+def _percentiles(samples):
+    latency = percentiles(samples, _FRACTIONS)
+    if not latency:
+        return "no samples"
+    return "p50 %.2fms  p90 %.2fms  p99 %.2fms  max %.2fms" % tuple(latency[fraction] * 1e3 for fraction in _FRACTIONS)
+
+
+class LoadStats:
+    def __init__(self):
+        self.matches = 0
+        self.results = {'X': 0, 'O': 0, None: 0}
+        self.errors = 0
+        self.move_latency = []
+        self.ai_latency = []
+        self.done = asyncio.Event()
+
+    def summary(self, elapsed):
+        return "\n".join([
+            "matches %d in %.1fs (%.0f matches/s)  X wins %d  O wins %d  draws %d  errors %d" % (
+                self.matches, elapsed, self.matches / elapsed, self.results['X'], self.results['O'],
+                self.results[None], self.errors),
+            "  move      %s" % _percentiles(self.move_latency),
+            "  ai reply  %s" % _percentiles(self.ai_latency),
+        ])
+
+
+async def _play(connect, opponent, target, stats, rng):
+    reader, writer = await connect()
+
+    def send(**message):
+        writer.write(json.dumps(message).encode() + b'\n')
+
+    try:
+        while stats.matches < target:
+            send(op='new', opponent=opponent, mark=rng.choice('XO') if opponent == 'ai' else 'X')
+            mark = None
+            sent_at = None
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                event = json.loads(line)
+                kind = event['event']
+                if kind == 'started':
+                    mark = event['mark']
+                elif kind == 'moved':
+                    now = time.perf_counter()
+                    if sent_at is not None:
+                        if event['mark'] == mark:
+                            stats.move_latency.append(now - sent_at)
+                        elif opponent == 'ai':
+                            stats.ai_latency.append(now - sent_at)
+                            sent_at = None
+                        if opponent == 'human':
+                            sent_at = None
+                elif kind == 'over':
+                    # Both players of a human match hear about it; count it once
+                    if opponent == 'ai' or mark == 'X':
+                        stats.matches += 1
+                        stats.results[event['winner']] += 1
+                        if stats.matches >= target:
+                            stats.done.set()
+                    break
+                elif kind == 'error':
+                    stats.errors += 1
+                    break
+
+                if kind in ('started', 'moved') and event['turn'] == mark and sent_at is None:
+                    free = [i + 1 for i, cell in enumerate(event['board']) if cell == '.']
+                    sent_at = time.perf_counter()
+                    send(op='move', position=rng.choice(free))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run(matches, concurrency, opponent='ai', host='127.0.0.1', port=8765, unix_path=None, seed=0):
+    """Plays ``matches`` matches over ``concurrency`` connections and returns the stats."""
+    if unix_path is not None:
+        def connect():
+            return asyncio.open_unix_connection(unix_path)
+    else:
+        def connect():
+            return asyncio.open_connection(host, port)
+
+    stats = LoadStats()
+    tasks = [asyncio.ensure_future(_play(connect, opponent, matches, stats, random.Random(seed * 1000003 + i)))
+             for i in range(concurrency)]
+    finished = asyncio.ensure_future(stats.done.wait())
+    all_stopped = asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.wait([finished, all_stopped], return_when=asyncio.FIRST_COMPLETED)
+    # Stop every client, including any left waiting for a human opponent
+    for task in tasks:
+        task.cancel()
+    finished.cancel()
+    for result in await all_stopped:
+        if isinstance(result, Exception):
+            raise result
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load against game_server.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="connect to a Unix socket instead of TCP")
+    parser.add_argument('--matches', type=int, default=10000, help="matches to play in total")
+    parser.add_argument('--concurrency', type=int, default=500, help="connections playing at once")
+    parser.add_argument('--opponent', choices=('ai', 'human'), default='ai',
+                        help="play the server's AI, or pair the connections up against each other")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random moves")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = asyncio.run(run(args.matches, args.concurrency, args.opponent, args.host, args.port, args.unix,
+                            args.seed))
+    print(stats.summary(time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,27 @@
+import argparse
+import logging
+import os
 import pygame
-import time
-import sys
-from game_logic import create_board, check_win, is_draw, ai_smart_move, place_mark, end_game_logic
+from ai_worker import AIWorker
+from assets import AssetManager
+from engine.deepening import DIFFICULTIES
+from engine.recording import GameRecorder
+from engine.session import SEARCH_MODES, default_search_mode
+from game_logic import create_board, check_win, is_draw, place_mark, end_game_logic, set_board_size, move_scores, \
+    set_search_mode, set_difficulty, stop_move_scores
 from game_additions import win_animation, draw_screen_animation, init_sounds, play_sound, stop_sound
+from render_cache import TextCache
+from scene_manager import QUIT, Scene, SceneManager
 
 ######################## PYGAME UI LOGIC ##########################
 
 # Initialize Pygame
 pygame.init()
 
+# Sounds, fonts and music, loaded once in the background while the menu comes up
+assets = AssetManager()
+assets.start()
+
 # Set up the display
 info = pygame.display.Info()  # Get the screen resolution
 WIDTH, HEIGHT = info.current_w, info.current_h  # Set to the full screen resolution
@@ -29,23 +42,78 @@ DARKER_GRAY = pygame.Color(30, 30, 30)
 PYTHON_BLUE = pygame.Color(52, 101, 164)  # Python Blue
 BORDER_COLOR = pygame.Color(255, 213, 79)  # Python Yellow for border
 
-# Load the Quicksand font
-# Adjust font sizes based on screen height for better scaling
-quicksand_font_size = int(HEIGHT * 0.15)  # 15% of screen height
-quicksand_font = pygame.font.Font('Quicksand-Regular.ttf', quicksand_font_size)  # Adjust as needed
+# Board shape, changed with configure_board (see --rows/--cols/--win-length)
+board_rows, board_cols = 3, 3
+board_win_length = 3
+
+# Font for the X and O marks
+QUICKSAND_FONT = 'Quicksand-Regular.ttf'
+
+# Rendered text and fonts, reused across frames
+text_cache = TextCache(open_font=assets.font)
+
+# Every finished game is appended to this log; summarize it with `python -m engine.recording game_log.bin`
+# The log is opened by main(), so importing this module (e.g. for a benchmark) records nothing
+GAME_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_log.bin')
+game_recorder = None
+
+
+def open_game_log():
+    global game_recorder
+    try:
+        game_recorder = GameRecorder(GAME_LOG)
+    except (OSError, ValueError) as e:  # Unwritable, or some other file is in the way
+        logging.getLogger(__name__).warning("Games won't be recorded: %s", e)
+
+# Button rects keyed by (label size, top), reused across frames; copy before changing one
+button_rects = {}
+
+# Grid background, rendered once per board size and resolution and reused every frame
+board_background = None
+
+# Translucent hint tiles keyed by (cell size, score), reused across frames
+hint_tiles = {}
+
+
+def invalidate_board_background():
+    global board_background
+    board_background = None
+
 
-font_size = int(HEIGHT * 0.06)  # 6% of screen height
-font = pygame.font.Font(None, font_size)
+# Adjust font sizes and padding to the screen size for better scaling
+def scale_to_screen():
+    global quicksand_font_size, font_size, title_font_size, exit_font_size, subtitle_font_size
+    global padding_x, padding_y
+    quicksand_font_size = int(min(HEIGHT * 0.45 / board_rows, WIDTH * 0.45 / board_cols))  # 15% of screen height on 3x3
+    font_size = int(HEIGHT * 0.06)  # 6% of screen height
+    title_font_size = int(HEIGHT * 0.1)  # 10% of screen height
+    exit_font_size = int(HEIGHT * 0.05)  # 5% of screen height
+    subtitle_font_size = int(HEIGHT * 0.05)  # 5% of screen height
 
-title_font_size = int(HEIGHT * 0.1)  # 10% of screen height
-title_font = pygame.font.Font(None, title_font_size)
+    # Padding for buttons
+    padding_x = WIDTH * 0.06  # 6% of screen width
+    padding_y = HEIGHT * 0.04  # 4% of screen height
 
-exit_font_size = int(HEIGHT * 0.05)  # 5% of screen height
-exit_font = pygame.font.Font(None, exit_font_size)
+    # Everything cached was sized for the old resolution
+    text_cache.set_resolution((WIDTH, HEIGHT))
+    button_rects.clear()
+    hint_tiles.clear()
+    invalidate_board_background()
 
-# Padding for buttons
-padding_x = WIDTH * 0.06  # 6% of screen width
-padding_y = HEIGHT * 0.04  # 4% of screen height
+
+# Switch the window to a new size and rescale everything drawn on it
+def set_resolution(width, height, flags=pygame.FULLSCREEN):
+    global WIDTH, HEIGHT, screen
+    WIDTH, HEIGHT = width, height
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), flags)
+    scale_to_screen()
+
+
+scale_to_screen()
+
+# Frame rate cap for every screen loop
+FPS = 60
+clock = pygame.time.Clock()
 
 # Button state to track expansion and pulsating
 button_states = {
@@ -59,43 +127,133 @@ button_states = {
 # Create the initial board
 game_board = create_board()
 
+# Seconds the AI appears to think before its move shows up (it never blocks the UI)
+AI_THINK_TIME = 1.0
+
+# Computes AI moves off the render thread
+ai_worker = AIWorker(min_think_time=AI_THINK_TIME)
+
+# Move hints: press H on the board to shade every free cell by how good it is for the player to move
+hints_enabled = False
+# Scores are cached per position, so revisited boards are instant
+hint_worker = AIWorker(search=move_scores, stop=stop_move_scores)
+HINT_WIN_COLOR = (0, 200, 0)
+HINT_DRAW_COLOR = (255, 213, 79)
+HINT_LOSS_COLOR = (255, 0, 0)
+
 
 def reset_board():
     global game_board
     game_board = create_board()
 
 
+# Switch the game to a rows x cols board where win_length marks in a row win
+def configure_board(rows, cols, win_length):
+    global board_rows, board_cols, board_win_length, quicksand_font_size
+    set_board_size(rows, cols, win_length)
+    board_rows, board_cols, board_win_length = rows, cols, win_length
+    # Scale the marks to the cell size
+    quicksand_font_size = int(min(HEIGHT * 0.45 / rows, WIDTH * 0.45 / cols))
+    invalidate_board_background()
+    reset_board()
+
+
+def get_board_background():
+    global board_background
+    if board_background is None:
+        board_background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        board_background.fill(DARKER_GRAY)
+        # Adjust the positions based on WIDTH and HEIGHT
+        for col in range(1, board_cols):
+            x = col * WIDTH / board_cols
+            pygame.draw.line(board_background, SOFT_YELLOW, (x, 0), (x, HEIGHT), 5)
+        for row in range(1, board_rows):
+            y = row * HEIGHT / board_rows
+            pygame.draw.line(board_background, SOFT_YELLOW, (0, y), (WIDTH, y), 5)
+    return board_background
+
+
 def draw_board():
-    screen.fill(DARKER_GRAY)
-    # Adjust the positions based on WIDTH and HEIGHT
-    pygame.draw.line(screen, SOFT_YELLOW, (WIDTH / 3, 0), (WIDTH / 3, HEIGHT), 5)
-    pygame.draw.line(screen, SOFT_YELLOW, (2 * WIDTH / 3, 0), (2 * WIDTH / 3, HEIGHT), 5)
-    pygame.draw.line(screen, SOFT_YELLOW, (0, HEIGHT / 3), (WIDTH, HEIGHT / 3), 5)
-    pygame.draw.line(screen, SOFT_YELLOW, (0, 2 * HEIGHT / 3), (WIDTH, 2 * HEIGHT / 3), 5)
+    screen.blit(get_board_background(), (0, 0))
+
+
+def cell_rect(row, col):
+    left = int(col * WIDTH / board_cols)
+    top = int(row * HEIGHT / board_rows)
+    return pygame.Rect(left, top, int((col + 1) * WIDTH / board_cols) - left,
+                       int((row + 1) * HEIGHT / board_rows) - top)
+
+
+# Returns the translucent tile shading a cell by its move score: green wins, yellow draws, red loses
+# Quicker wins and losses are shaded stronger
+def hint_tile(size, score):
+    if -1 < score < 1:
+        score = 0  # A heuristic guess from a time-limited search, not a proven result
+    key = (size, score)
+    tile = hint_tiles.get(key)
+    if tile is None:
+        strength = abs(score) / (board_rows * board_cols + 1)
+        if score > 0:
+            color = HINT_WIN_COLOR + (int(60 + 100 * strength),)
+        elif score < 0:
+            color = HINT_LOSS_COLOR + (int(60 + 100 * strength),)
+        else:
+            color = HINT_DRAW_COLOR + (50,)
+        tile = hint_tiles[key] = pygame.Surface(size, pygame.SRCALPHA)
+        tile.fill(color)
+    return tile
+
+
+# Draws one cell (background and mark, if any) and returns its rect for a partial display update
+# hints maps positions to move scores; free cells with a score get shaded
+def draw_cell(board, row, col, hints=None):
+    rect = cell_rect(row, col)
+    screen.blit(get_board_background(), rect, rect)
+    mark = board[row][col]
+    if mark in ('X', 'O'):
+        # Render the mark in blue using the Quicksand font, centered in the cell
+        text = text_cache.render(mark, PYTHON_BLUE, quicksand_font_size, QUICKSAND_FONT)
+        screen.blit(text, text.get_rect(center=rect.center))
+    elif hints:
+        score = hints.get(row * board_cols + col + 1)
+        if score is not None:
+            screen.blit(hint_tile(rect.size, score), rect)
+    return rect
+
+
+# Redraws every free cell (with or without hints) and returns their rects
+def draw_free_cells(board, hints=None):
+    rects = []
+    for row in range(board_rows):
+        for col in range(board_cols):
+            if board[row][col] not in ('X', 'O'):
+                rects.append(draw_cell(board, row, col, hints))
+    return rects
 
 
 def draw_marks(board):
-    for row in range(3):
-        for col in range(3):
-            x_pos = col * WIDTH / 3 + WIDTH / 6  # Center of the cell horizontally
-            y_pos = row * HEIGHT / 3 + HEIGHT / 6  # Center of the cell vertically
+    for row in range(board_rows):
+        for col in range(board_cols):
+            if board[row][col] in ('X', 'O'):
+                draw_cell(board, row, col)
+
 
-            if board[row][col] == 'X':
-                # Render X using the Quicksand font
-                text = quicksand_font.render('X', True, PYTHON_BLUE)  # Render the "X" in blue
-                screen.blit(text, text.get_rect(center=(x_pos, y_pos)))
+# Redraws the whole board screen
+def draw_full_board(board):
+    draw_board()
+    draw_marks(board)
+    pygame.display.update()
 
-            elif board[row][col] == 'O':
-                # Render O using the Quicksand font
-                text = quicksand_font.render('O', True, PYTHON_BLUE)  # Render the "O" in blue
-                screen.blit(text, text.get_rect(center=(x_pos, y_pos)))
+
+# Events after which the window contents must be redrawn in full
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
 
 
 def get_mouse_position():
     x, y = pygame.mouse.get_pos()
-    row = int(y // (HEIGHT / 3))
-    col = int(x // (WIDTH / 3))
-    position = row * 3 + col + 1
+    row = min(int(y // (HEIGHT / board_rows)), board_rows - 1)
+    col = min(int(x // (WIDTH / board_cols)), board_cols - 1)
+    position = row * board_cols + col + 1
     return row, col, position
 
 
@@ -104,24 +262,28 @@ def is_hovering(mouse_pos, button_rect):
     return button_rect.collidepoint(mouse_pos)
 
 
+# Returns a padded button rect centered horizontally around a label, top at the given screen height fraction
+def button_rect(text, top_fraction):
+    key = (text.get_size(), top_fraction)
+    rect = button_rects.get(key)
+    if rect is None:
+        rect = button_rects[key] = pygame.Rect(
+            (WIDTH - text.get_width()) / 2 - padding_x,
+            HEIGHT * top_fraction,
+            text.get_width() + 2 * padding_x,
+            text.get_height() + 2 * padding_y
+        )
+    return rect.copy()  # Callers inflate their copy for hover and pulsate effects
+
+
 def draw_buttons():
     # Define button rectangles with padding for text
-    single_player_text = font.render("1 Player", True, SOFT_YELLOW)
-    two_player_text = font.render("2 Player", True, SOFT_YELLOW)
+    single_player_text = text_cache.render("1 Player", SOFT_YELLOW, font_size)
+    two_player_text = text_cache.render("2 Player", SOFT_YELLOW, font_size)
 
     # Calculate button positions relative to screen size
-    single_player_button = pygame.Rect(
-        (WIDTH - single_player_text.get_width()) / 2 - padding_x,
-        HEIGHT * 0.3,
-        single_player_text.get_width() + 2 * padding_x,
-        single_player_text.get_height() + 2 * padding_y
-    )
-    two_player_button = pygame.Rect(
-        (WIDTH - two_player_text.get_width()) / 2 - padding_x,
-        HEIGHT * 0.45,
-        two_player_text.get_width() + 2 * padding_x,
-        two_player_text.get_height() + 2 * padding_y
-    )
+    single_player_button = button_rect(single_player_text, 0.3)
+    two_player_button = button_rect(two_player_text, 0.45)
 
     # Expand effect on hover
     expand_size = 10 if button_states['single_player_hover'] else 0
@@ -154,21 +316,11 @@ def draw_buttons():
 
 
 def draw_end_buttons():
-    play_again_text = font.render("Play Again", True, SOFT_YELLOW)
-    exit_text = exit_font.render("Exit", True, SOFT_YELLOW)
-
-    play_again_button = pygame.Rect(
-        (WIDTH - play_again_text.get_width()) / 2 - padding_x,
-        HEIGHT * 0.5,
-        play_again_text.get_width() + 2 * padding_x,
-        play_again_text.get_height() + 2 * padding_y
-    )
-    exit_button = pygame.Rect(
-        (WIDTH - exit_text.get_width()) / 2 - padding_x,
-        HEIGHT * 0.65,
-        exit_text.get_width() + 2 * padding_x,
-        exit_text.get_height() + 2 * padding_y
-    )
+    play_again_text = text_cache.render("Play Again", SOFT_YELLOW, font_size)
+    exit_text = text_cache.render("Exit", SOFT_YELLOW, exit_font_size)
+
+    play_again_button = button_rect(play_again_text, 0.5)
+    exit_button = button_rect(exit_text, 0.65)
 
     mouse_pos = pygame.mouse.get_pos()
 
@@ -186,134 +338,228 @@ def draw_end_buttons():
     return play_again_button, exit_button
 
 
+# Seconds a scene waiting on an AIWorker can sleep: until the answer is due, or a frame while it is still searching
+def worker_delay(worker):
+    ready_in = worker.ready_in()
+    return 1 / FPS if ready_in is None else ready_in
+
+
+# Board scene shared by both game modes: marks, sounds and the end of the game
+class BoardScene(Scene):
+    mode = None  # Game mode written to the game log
+    ai_mark = None
+
+    def enter(self):
+        self.win_sound, self.click_sound, self.draw_sound, self.soundtrack = init_sounds(assets)  # Preloaded sounds, no file I/O
+        play_sound(self.soundtrack, loop=True, volume=0.3)  # Start background soundtrack at lower volume
+        reset_board()  # Ensure the board is reset for a new game
+        self.full_redraw = True
+        self.dirty_rects = []  # Screen areas changed since the last frame
+        self.moves = []  # Positions played, for the game log
+        self.ai_seconds = []  # Search time of each AI move
+        self.hints = None  # Move scores shown on the free cells
+        self.hint_request = None  # (moves played, mark) the hint worker was last asked about
+
+    def leave(self):
+        hint_worker.cancel()
+
+    # The mark of the human player to move, or None while the AI is thinking
+    def human_to_move(self):
+        return None
+
+    def handle_event(self, event):
+        global hints_enabled
+        if event.type in REDRAW_EVENTS:
+            self.full_redraw = True
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+            hints_enabled = not hints_enabled
+            if not hints_enabled:
+                self.clear_hints()
+        return None
+
+    def update(self, dt):
+        # Ask for hints once per human turn; the scores arrive a few frames later
+        mark = self.human_to_move()
+        if hints_enabled and mark is not None and self.hint_request != (len(self.moves), mark):
+            self.hint_request = (len(self.moves), mark)
+            hint_worker.request_move(game_board, 'O' if mark == 'X' else 'X', mark)
+        if self.hint_request is not None and self.hints is None:
+            hints = hint_worker.poll()
+            if hints is not None:
+                self.hints = hints
+                self.dirty_rects.extend(draw_free_cells(game_board, hints))
+        return None
+
+    def clear_hints(self):
+        hint_worker.cancel()
+        self.hint_request = None
+        if self.hints is not None:
+            self.hints = None
+            self.dirty_rects.extend(draw_free_cells(game_board))
+
+    # Places mark at position and returns the animation scene if that ended the game
+    def play_move(self, mark, position, winner_name):
+        self.clear_hints()  # They were for the position before this move
+        place_mark(game_board, mark, position)
+        self.moves.append(position)
+        self.dirty_rects.append(draw_cell(game_board, *divmod(position - 1, board_cols)))  # Show the new mark
+        play_sound(self.click_sound)  # Play click sound on valid move
+        if check_win(game_board, mark, position):
+            stop_sound(self.soundtrack)  # Stop the background music
+            play_sound(self.win_sound)  # Play win sound
+            self.record_game(mark)
+            # Display WINNER screen with confetti, held for 3 seconds before showing GAME OVER
+            return AnimationScene(win_animation(screen, "WINNER", winner_name, WIDTH, HEIGHT, confetti_stop=False,
+                                                font=text_cache.font(title_font_size)))
+        if is_draw(game_board):
+            stop_sound(self.soundtrack)  # Stop the background music
+            play_sound(self.draw_sound)  # Play draw sound
+            self.record_game(None)
+            return AnimationScene(draw_screen_animation(screen, WIDTH, HEIGHT, text_cache.font(title_font_size)))
+        return None
+
+    def record_game(self, winner):
+        if game_recorder is None:
+            return
+        try:
+            game_recorder.record(self.moves, winner, self.mode, rows=board_rows, cols=board_cols,
+                                 win_length=board_win_length, ai_mark=self.ai_mark, ai_seconds=self.ai_seconds)
+        except (OSError, ValueError) as e:  # A lost record must never end the game
+            logging.getLogger(__name__).warning("Couldn't record the game: %s", e)
+
+    def draw(self):
+        if self.full_redraw:
+            self.full_redraw = False
+            self.dirty_rects = []
+            draw_board()
+            draw_marks(game_board)
+            if self.hints is not None:
+                draw_free_cells(game_board, self.hints)
+            return [screen.get_rect()]
+        dirty_rects, self.dirty_rects = self.dirty_rects, []
+        return dirty_rects  # Only push the cells that changed
+
+    def wakeup_delay(self):
+        # Nothing moves between clicks, except hints on their way
+        if self.hint_request is not None and self.hints is None:
+            return worker_delay(hint_worker)
+        return None
+
+
 # Player vs AI Mode
-def single_player_mode(player_mark, ai_mark):
-    win_sound, click_sound, draw_sound, soundtrack = init_sounds()  # Initialize sounds
-
-    play_sound(soundtrack, loop=True, volume=0.3)  # Start background soundtrack at lower volume
-
-    reset_board()  # Ensure the board is reset for a new game
-    player = 'Player'
-    game_over = False
-
-    while not game_over:
-        draw_board()
-        draw_marks(game_board)
-        pygame.display.update()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if player == 'Player':
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    row, col, position = get_mouse_position()
-                    if place_mark(game_board, player_mark, position):
-                        play_sound(click_sound)  # Play click sound on valid move
-                        if check_win(game_board, player_mark):
-                            stop_sound(soundtrack)  # Stop the background music
-                            play_sound(win_sound)  # Play win sound
-                            # Display WINNER screen with confetti
-                            win_animation(screen, "WINNER", "PLAYER 1", WIDTH, HEIGHT, confetti_stop=False)
-                            pygame.time.delay(3000)  # Delay for 3 seconds before showing GAME OVER
-                            game_over = True
-                        elif is_draw(game_board):
-                            stop_sound(soundtrack)  # Stop the background music
-                            play_sound(draw_sound)  # Play draw sound
-                            draw_screen_animation(screen, WIDTH, HEIGHT)  # Play draw animation
-                            game_over = True
-                        player = 'AI'
-            else:
-                time.sleep(1)  # AI "thinks"
-                ai_choice = ai_smart_move(game_board, player_mark, ai_mark)
-                place_mark(game_board, ai_mark, ai_choice)
-                play_sound(click_sound)  # Play click sound for AI move
-                if check_win(game_board, ai_mark):
-                    stop_sound(soundtrack)  # Stop the background music
-                    play_sound(win_sound)  # Play win sound
-                    # Display WINNER screen with confetti
-                    win_animation(screen, "WINNER", "Matt!", WIDTH, HEIGHT, confetti_stop=False)
-                    pygame.time.delay(3000)  # Delay for 3 seconds before showing GAME OVER
-                    game_over = True
-                elif is_draw(game_board):
-                    stop_sound(soundtrack)  # Stop the background music
-                    play_sound(draw_sound)  # Play draw sound
-                    draw_screen_animation(screen, WIDTH, HEIGHT)  # Play draw animation
-                    game_over = True
-                player = 'Player'
-
-    if game_over:
-        end_game_logic()
-    # Transition to "GAME OVER" screen
-    show_game_over_screen()
+class SinglePlayerScene(BoardScene):
+    mode = 'single_player'
+
+    def __init__(self, player_mark, ai_mark):
+        self.player_mark = player_mark
+        self.ai_mark = ai_mark
+
+    def enter(self):
+        super().enter()
+        self.player = 'Player'
+
+    def leave(self):
+        super().leave()
+        ai_worker.cancel()  # Drop the AI's move if it is still thinking
+
+    def human_to_move(self):
+        return self.player_mark if self.player == 'Player' else None
+
+    def handle_event(self, event):
+        super().handle_event(event)
+        if self.player == 'Player' and event.type == pygame.MOUSEBUTTONDOWN:
+            row, col, position = get_mouse_position()
+            if game_board[row][col] not in ('X', 'O'):
+                next_scene = self.play_move(self.player_mark, position, "PLAYER 1")
+                if next_scene is not None:
+                    end_game_logic()  # The AI stops playing randomly after the first game
+                    return next_scene
+                self.player = 'AI'
+                ai_worker.request_move(game_board, self.player_mark, self.ai_mark)  # AI "thinks" in the background
+        return None
+
+    def update(self, dt):
+        if self.player == 'AI':
+            ai_choice = ai_worker.poll()  # None until the AI has finished thinking
+            if ai_choice is not None:
+                self.player = 'Player'
+                self.ai_seconds.append(ai_worker.last_seconds)
+                next_scene = self.play_move(self.ai_mark, ai_choice, "Matt!")
+                if next_scene is not None:
+                    end_game_logic()
+                    return next_scene
+        return super().update(dt)
+
+    def wakeup_delay(self):
+        delay = super().wakeup_delay()
+        if self.player == 'AI':
+            ai_delay = worker_delay(ai_worker)  # Wakes right when the move is due to show
+            delay = ai_delay if delay is None else min(delay, ai_delay)
+        return delay
 
 
 # Two-player mode
-def two_player_mode(player_1, player_2):
-    win_sound, click_sound, draw_sound, soundtrack = init_sounds()  # Initialize sounds
-
-    play_sound(soundtrack, loop=True, volume=0.3)  # Start background soundtrack at lower volume
-
-    reset_board()  # Ensure the board is reset for a new game
-    current_player = 'Player 1'
-    current_mark = player_1
-    game_over = False
-
-    while not game_over:
-        draw_board()
-        draw_marks(game_board)
-        pygame.display.update()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                row, col, position = get_mouse_position()
-                if place_mark(game_board, current_mark, position):
-                    play_sound(click_sound)  # Play click sound on valid move
-                    if check_win(game_board, current_mark):
-                        stop_sound(soundtrack)  # Stop the background music
-                        play_sound(win_sound)  # Play win sound
-                        # Display WINNER screen with confetti
-                        win_animation(screen, "WINNER", current_player, WIDTH, HEIGHT, confetti_stop=False)
-                        pygame.time.delay(3000)  # Delay for 3 seconds before showing GAME OVER
-                        game_over = True
-                    elif is_draw(game_board):
-                        stop_sound(soundtrack)  # Stop the background music
-                        play_sound(draw_sound)  # Play draw sound
-                        draw_screen_animation(screen, WIDTH, HEIGHT)  # Play draw animation
-                        game_over = True
-
-                    # Switch turns
-                    if current_player == 'Player 1':
-                        current_player = 'Player 2'
-                        current_mark = player_2
-                    else:
-                        current_player = 'Player 1'
-                        current_mark = player_1
-
-    # Transition to "GAME OVER" screen
-    show_game_over_screen()
+class TwoPlayerScene(BoardScene):
+    mode = 'two_player'
+
+    def __init__(self, player_1, player_2):
+        self.player_1 = player_1
+        self.player_2 = player_2
+
+    def enter(self):
+        super().enter()
+        self.current_player = 'Player 1'
+        self.current_mark = self.player_1
+
+    def human_to_move(self):
+        return self.current_mark
+
+    def handle_event(self, event):
+        super().handle_event(event)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            row, col, position = get_mouse_position()
+            if game_board[row][col] not in ('X', 'O'):
+                next_scene = self.play_move(self.current_mark, position, self.current_player)
+                if next_scene is not None:
+                    return next_scene
+
+                # Switch turns
+                if self.current_player == 'Player 1':
+                    self.current_player = 'Player 2'
+                    self.current_mark = self.player_2
+                else:
+                    self.current_player = 'Player 1'
+                    self.current_mark = self.player_1
+        return None
+
+
+# Win or draw animation over the final board, then the "GAME OVER" screen
+class AnimationScene(Scene):
+    def __init__(self, animation):
+        self.animation = animation
+
+    def update(self, dt):
+        if self.animation.done:
+            return GameOverScene()  # Transition to "GAME OVER" screen
+        self.animation.update(dt)
+        return None
+
+    def draw(self):
+        return [screen.get_rect()] if self.animation.draw() else []
+
+    def wakeup_delay(self):
+        # Once the last frame is on screen, sleep until it has been shown long enough
+        if self.animation.animating:
+            return 0
+        return max(0.0, self.animation.time_left)
+
 
 def draw_exit_and_play_again_buttons():
-    exit_text = exit_font.render("Exit", True, SOFT_YELLOW)
-    play_again_text = exit_font.render("Play Again", True, SOFT_YELLOW)
-
-    exit_button = pygame.Rect(
-        (WIDTH - exit_text.get_width()) / 2 - padding_x,
-        HEIGHT * 0.7,
-        exit_text.get_width() + 2 * padding_x,
-        exit_text.get_height() + 2 * padding_y
-    )
-    play_again_button = pygame.Rect(
-        (WIDTH - play_again_text.get_width()) / 2 - padding_x,
-        HEIGHT * 0.55,
-        play_again_text.get_width() + 2 * padding_x,
-        play_again_text.get_height() + 2 * padding_y
-    )
+    exit_text = text_cache.render("Exit", SOFT_YELLOW, exit_font_size)
+    play_again_text = text_cache.render("Play Again", SOFT_YELLOW, exit_font_size)
+
+    exit_button = button_rect(exit_text, 0.7)
+    play_again_button = button_rect(play_again_text, 0.55)
 
     mouse_pos = pygame.mouse.get_pos()
 
@@ -343,11 +589,22 @@ def draw_exit_and_play_again_buttons():
 
     return exit_button, play_again_button
 
-def show_game_over_screen():
-    while True:
+class GameOverScene(Scene):
+    def enter(self):
+        self.exit_button = self.play_again_button = None
+        self.hover = None  # (exit, play again) hover state last drawn
+        self.needs_redraw = True
+
+    def hover_state(self, pos):
+        return is_hovering(pos, self.exit_button), is_hovering(pos, self.play_again_button)
+
+    def draw(self):
+        if not self.needs_redraw:
+            return []
+        self.needs_redraw = False
         screen.fill(DARKER_GRAY)
         # Display "GAME OVER" text
-        game_over_text = title_font.render("GAME OVER", True, SOFT_YELLOW)
+        game_over_text = text_cache.render("GAME OVER", SOFT_YELLOW, title_font_size)
         screen.blit(game_over_text, (WIDTH // 2 - game_over_text.get_width() // 2, HEIGHT * 0.3))
 
         # Draw the Exit and Play Again buttons with hover effect
@@ -361,79 +618,122 @@ def show_game_over_screen():
             exit_button.inflate_ip(10, 10)
         if is_hovering(mouse_pos, play_again_button):
             play_again_button.inflate_ip(10, 10)
-
-        pygame.display.update()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if is_hovering(mouse_pos, exit_button):
-                    pygame.quit()
-                    sys.exit()
-                if is_hovering(mouse_pos, play_again_button):
-                    reset_board()
-                    main()  # Restart the game
+        self.exit_button, self.play_again_button = exit_button, play_again_button
+        self.hover = self.hover_state(mouse_pos)
+        return [screen.get_rect()]
+
+    def handle_event(self, event):
+        if event.type in REDRAW_EVENTS:
+            self.needs_redraw = True
+        elif event.type == pygame.MOUSEMOTION and self.hover is not None:
+            # Redraw only when the pointer crosses a button edge
+            if self.hover_state(event.pos) != self.hover:
+                self.needs_redraw = True
+        if event.type == pygame.MOUSEBUTTONDOWN and self.exit_button is not None:
+            if is_hovering(event.pos, self.exit_button):
+                return QUIT
+            if is_hovering(event.pos, self.play_again_button):
+                reset_board()
+                return MenuScene()  # Back to the mode selection
+        return None
+
+    def wakeup_delay(self):
+        return None  # Only input changes this screen
 
 ###################################################################
 
 # Game mode selection
-def main():
-    # Reset button states to avoid spazzing out when returning to the menu
-    button_states['single_player_hover'] = False
-    button_states['two_player_hover'] = False
-    button_states['single_player_clicked'] = False
-    button_states['two_player_clicked'] = False
-    button_states['pulsate_timer'] = 2
-
-    running = True
-
-    while running:
+class MenuScene(Scene):
+    def enter(self):
+        # Reset button states to avoid spazzing out when returning to the menu
+        button_states['single_player_hover'] = False
+        button_states['two_player_hover'] = False
+        button_states['single_player_clicked'] = False
+        button_states['two_player_clicked'] = False
+        button_states['pulsate_timer'] = 2
+        self.single_player_button = self.two_player_button = None
+        self.needs_redraw = True
+
+    # Updates the hover flags for the mouse at pos; returns True if either changed
+    def update_hover(self, pos):
+        hover = (is_hovering(pos, self.single_player_button), is_hovering(pos, self.two_player_button))
+        changed = hover != (button_states['single_player_hover'], button_states['two_player_hover'])
+        button_states['single_player_hover'], button_states['two_player_hover'] = hover
+        return changed
+
+    def pulsating(self):
+        return button_states['single_player_clicked'] or button_states['two_player_clicked']
+
+    def draw(self):
+        if not (self.needs_redraw or self.pulsating()):
+            return []
+        self.needs_redraw = False
         screen.fill(DARKER_GRAY)
 
         # Add title
-        title_text = title_font.render("Tic Tac Toe", True, SOFT_YELLOW)
+        title_text = text_cache.render("Tic Tac Toe", SOFT_YELLOW, title_font_size)
         screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT * 0.1))
 
         # Add subtitle
-        subtitle_font = pygame.font.Font(None, int(HEIGHT * 0.05))  # Create a smaller font for the subtitle
-        subtitle_text = subtitle_font.render("Try your luck in single player versus Matt!", True, SOFT_YELLOW)
-        subsubtitle_text = subtitle_font.render("100 bucks says Matt will never let you win.", True, SOFT_YELLOW)
+        subtitle_text = text_cache.render("Try your luck in single player versus Matt!", SOFT_YELLOW, subtitle_font_size)
+        subsubtitle_text = text_cache.render("100 bucks says Matt will never let you win.", SOFT_YELLOW,
+                                             subtitle_font_size)
         screen.blit(subtitle_text, (WIDTH // 2 - subtitle_text.get_width() // 2, HEIGHT * 0.2))
         screen.blit(subsubtitle_text, (WIDTH // 2 - subtitle_text.get_width() // 2, HEIGHT * 0.25))
 
         # Define button rectangles with padding
-        single_player_button, two_player_button = draw_buttons()
+        self.single_player_button, self.two_player_button = draw_buttons()
+
+        # Handle mouse hover; the buttons were drawn with the old state, so show a change next frame
+        if self.update_hover(pygame.mouse.get_pos()):
+            self.needs_redraw = True
+        return [screen.get_rect()]
+
+    def handle_event(self, event):
+        if event.type in REDRAW_EVENTS:
+            self.needs_redraw = True
+        elif event.type == pygame.MOUSEMOTION and self.single_player_button is not None:
+            # Redraw only when the pointer crosses a button edge
+            if self.update_hover(event.pos):
+                self.needs_redraw = True
+        if event.type == pygame.MOUSEBUTTONDOWN and self.single_player_button is not None:
+            if is_hovering(event.pos, self.single_player_button):
+                button_states['single_player_clicked'] = True
+                button_states['pulsate_timer'] = 0
+                return SinglePlayerScene('X', 'O')  # Start single-player mode
+            if is_hovering(event.pos, self.two_player_button):
+                button_states['two_player_clicked'] = True
+                button_states['pulsate_timer'] = 0
+                return TwoPlayerScene('X', 'O')  # Start two-player mode
+        return None
+
+    def wakeup_delay(self):
+        # A clicked button pulsates every frame; otherwise only input changes the menu
+        return 0 if self.needs_redraw or self.pulsating() else None
 
-        # Handle mouse hover and click events
-        mouse_pos = pygame.mouse.get_pos()
-
-        button_states['single_player_hover'] = is_hovering(mouse_pos, single_player_button)
-        button_states['two_player_hover'] = is_hovering(mouse_pos, two_player_button)
-
-        pygame.display.update()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if is_hovering(mouse_pos, single_player_button):
-                    button_states['single_player_clicked'] = True
-                    button_states['pulsate_timer'] = 0
-                    single_player_mode('X', 'O')  # Start single-player mode
-                    button_states['single_player_clicked'] = False
-                elif is_hovering(mouse_pos, two_player_button):
-                    button_states['two_player_clicked'] = True
-                    button_states['pulsate_timer'] = 0
-                    two_player_mode('X', 'O')  # Start two-player mode
-                    button_states['two_player_clicked'] = False
 
+def main():
+    open_game_log()
+    # Every screen runs in this one loop until the player exits or closes the window
+    SceneManager(MenuScene(), clock, FPS).run()
     pygame.quit()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tic Tac Toe")
+    parser.add_argument('--rows', type=int, default=3, help="number of board rows")
+    parser.add_argument('--cols', type=int, default=3, help="number of board columns")
+    parser.add_argument('--win-length', type=int, default=3, help="marks in a row needed to win")
+    parser.add_argument('--search', choices=SEARCH_MODES,
+                        help="AI search (default: alphabeta, or deepening within --think-time on boards over "
+                             "16 cells); 'mcts' also plays big boards within --think-time")
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help="seconds per AI move with --search mcts or deepening")
+    parser.add_argument('--difficulty', choices=tuple(DIFFICULTIES),
+                        help="AI depth/time budget, instead of a random first game and perfect play after")
+    args = parser.parse_args()
+    configure_board(args.rows, args.cols, args.win_length)
+    set_search_mode(args.search or default_search_mode(args.rows, args.cols), args.think_time)
+    if args.difficulty:
+        set_difficulty(args.difficulty)
     main()
@@ -0,0 +1,59 @@
+"""Confetti particle system with NumPy state and batched blits."""
+
+import numpy as np
+import pygame
+
+# Red, Blue, Green, Yellow, Orange
+CONFETTI_COLORS = ((255, 0, 0), (0, 0, 255), (0, 255, 0), (255, 255, 0), (255, 165, 0))
+CONFETTI_SIZES = (5, 6, 7, 8, 9, 10)
+
+
+class Confetti:
+    """Falling confetti: positions and velocities live in NumPy arrays.
+
+    ``update`` moves every particle in a few array operations and recycles
+    the ones that fall off the bottom back to the top. ``draw`` blits one
+    pre-rendered square per particle in a single ``Surface.blits`` call.
+    Speeds are in pixels per second, scaled to the screen height.
+    """
+
+    def __init__(self, width, height, count=3000, seed=None):
+        self.width = width
+        self.height = height
+        self._rng = np.random.default_rng(seed)
+        rng = self._rng
+
+        # Start spread over the whole screen so the first frame is already full
+        self.positions = np.column_stack((rng.uniform(0, width, count), rng.uniform(-height, height, count)))
+        self.velocities = np.column_stack((rng.uniform(-0.05, 0.05, count) * height,
+                                           rng.uniform(0.15, 0.35, count) * height))
+        self.sway = rng.uniform(0, 2 * np.pi, count)  # Phase of each piece's side-to-side drift
+        self.time = 0.0
+
+        # One square surface per (color, size); each particle picks one
+        self._sprites = []
+        for color in CONFETTI_COLORS:
+            for size in CONFETTI_SIZES:
+                sprite = pygame.Surface((size, size))
+                sprite.fill(color)
+                self._sprites.append(sprite)
+        sprite_index = rng.integers(0, len(self._sprites), count)
+        self._particle_sprites = [self._sprites[i] for i in sprite_index]
+
+    def update(self, dt):
+        """Advances every particle by ``dt`` seconds."""
+        self.time += dt
+        drift = np.sin(self.sway + self.time * 3.0) * (0.04 * self.height)
+        self.positions[:, 0] += (self.velocities[:, 0] + drift) * dt
+        self.positions[:, 1] += self.velocities[:, 1] * dt
+
+        # Pieces that fell off the bottom start again above the top, at a new column
+        fallen = self.positions[:, 1] > self.height
+        if fallen.any():
+            self.positions[fallen, 1] -= self.height + 10
+            self.positions[fallen, 0] = self._rng.uniform(0, self.width, int(fallen.sum()))
+        np.mod(self.positions[:, 0], self.width, out=self.positions[:, 0])
+
+    def draw(self, screen):
+        """Blits every particle onto ``screen``."""
+        screen.blits(zip(self._particle_sprites, self.positions.astype(np.int32).tolist()), doreturn=False)
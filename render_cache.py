@@ -0,0 +1,65 @@
+"""Caches for rendered text so screens don't re-render glyphs every frame."""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """Fonts and rendered text surfaces, reused across frames.
+
+    Fonts are keyed by ``(path, size)`` (``path=None`` is pygame's default
+    font) and kept until ``clear``. Text surfaces are keyed by
+    ``(path, size, text, color, antialias)``; once ``max_surfaces`` are held
+    the least recently used one is dropped. Call ``set_resolution`` whenever
+    the screen size changes, since every size is derived from it.
+
+    ``open_font(path, size)`` creates fonts on a miss; pass
+    ``AssetManager.font`` to build them from preloaded font files.
+    """
+
+    def __init__(self, max_surfaces=256, open_font=pygame.font.Font):
+        self.max_surfaces = max_surfaces
+        self.open_font = open_font
+        self._fonts = {}
+        self._surfaces = OrderedDict()
+        self._resolution = None
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size, path=None):
+        """Returns the cached ``pygame.font.Font`` for ``path`` at ``size``."""
+        key = (path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = self.open_font(path, size)
+        return font
+
+    def render(self, text, color, size, path=None, antialias=True):
+        """Returns ``text`` rendered in ``color``, rendering it only on a miss.
+
+        The surface is shared: blit it, don't draw on it.
+        """
+        key = (path, size, text, tuple(pygame.Color(color)), antialias)
+        surfaces = self._surfaces
+        surface = surfaces.get(key)
+        if surface is not None:
+            surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font(size, path).render(text, antialias, color)
+        surfaces[key] = surface
+        if len(surfaces) > self.max_surfaces:
+            surfaces.popitem(last=False)
+        return surface
+
+    def set_resolution(self, resolution):
+        """Drops everything if ``resolution`` differs from the last one seen."""
+        if resolution != self._resolution:
+            self.clear()
+            self._resolution = resolution
+
+    def clear(self):
+        self._fonts.clear()
+        self._surfaces.clear()
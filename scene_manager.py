@@ -0,0 +1,105 @@
+"""One event loop for every screen of the game.
+
+Each screen (menu, board, end-of-game animation, game over) is a ``Scene``.
+``SceneManager.run`` owns the only loop: every frame it hands the pending
+events to the current scene, updates it, pushes whatever it redrew to the
+display and waits out the rest of the frame. A scene moves on by returning
+the next scene from ``handle_event`` or ``update``, so going from one game
+to the next replaces the old scene instead of calling deeper into the stack.
+
+A scene with nothing moving on its own says so through ``wakeup_delay``,
+and the loop then sleeps in ``pygame.event.wait`` until input arrives or
+the scene's next timer tick is due, instead of spinning at the frame rate.
+An idle menu costs next to no CPU.
+"""
+
+import pygame
+
+# Returned by a scene instead of a next scene to end the loop
+QUIT = object()
+
+
+class Scene:
+    """Base class for a screen; override the hooks it needs."""
+
+    def enter(self):
+        """Called when the scene becomes the current one."""
+
+    def leave(self):
+        """Called when the scene stops being the current one (or on quit)."""
+
+    def handle_event(self, event):
+        """Reacts to one event; returns the next scene, ``QUIT`` or None to stay."""
+        return None
+
+    def update(self, dt):
+        """Advances the scene by ``dt`` seconds; returns like ``handle_event``."""
+        return None
+
+    def draw(self):
+        """Draws the frame and returns the list of screen rects it changed."""
+        return []
+
+    def wakeup_delay(self):
+        """Returns the seconds until the scene changes again without any input.
+
+        0 (the default) runs a frame every tick, for animations; None sleeps
+        until the next event. After a timed sleep the time slept is part of
+        the next ``update``'s ``dt``.
+        """
+        return 0
+
+
+class SceneManager:
+    """Runs scenes one at a time at no more than ``fps`` frames per second."""
+
+    def __init__(self, scene, clock, fps=60):
+        self.scene = scene
+        self.clock = clock
+        self.fps = fps
+
+    def switch(self, scene):
+        """Makes ``scene`` current, or stops the loop if it is ``QUIT``."""
+        self.scene.leave()
+        if scene is QUIT:
+            self.scene = None
+        else:
+            self.scene = scene
+            scene.enter()
+
+    def run(self):
+        """Runs until a scene returns ``QUIT`` or the window is closed."""
+        self.scene.enter()
+        dt = 0.0
+        woken_by = []  # The event that ended an idle wait, handled with the next frame's
+        while self.scene is not None:
+            next_scene = None
+            events, woken_by = woken_by + pygame.event.get(), []
+            for event in events:
+                if event.type == pygame.QUIT:
+                    next_scene = QUIT
+                else:
+                    next_scene = self.scene.handle_event(event)
+                if next_scene is not None:
+                    break  # The rest of this frame's events were meant for the old scene
+            if next_scene is None:
+                next_scene = self.scene.update(dt)
+            if next_scene is not None:
+                self.switch(next_scene)
+                if self.scene is None:
+                    break
+
+            dirty_rects = self.scene.draw()
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+            dt = self.clock.tick(self.fps) / 1000.0
+
+            delay = self.scene.wakeup_delay()
+            if delay != 0:
+                # Nothing is moving: sleep until input or the scene's next timer tick
+                event = pygame.event.wait(0 if delay is None else max(1, round(delay * 1000)))
+                if event.type != pygame.NOEVENT:
+                    woken_by.append(event)
+                asleep = self.clock.tick() / 1000.0
+                if delay is not None:
+                    dt += asleep  # The scene is timing something, so its clock runs on through the sleep
@@ -0,0 +1,208 @@
+"""Headless self-play: plays many games between AI agents without pygame.
+
+Games are split into chunks and played across a process pool; results are
+merged and reported as each chunk finishes.
+
+    python simulator.py --games 1000000 --x smart --o random
+
+Agents:
+    smart       game_logic.ai_smart_move with the first-game rigging off
+    random      a uniformly random legal move
+    first_game  the in-app AI: random in the very first game, smart after
+                (the Session.first_game / end_game_logic behaviour)
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import game_logic
+
+AGENTS = ('smart', 'random', 'first_game')
+MARKS = ('X', 'O')
+
+# Per-move timings are bucketed on a log scale so chunks can be merged and
+# percentiles read off without keeping every sample
+_BUCKETS_PER_DOUBLING = 8
+_MIN_SECONDS = 1e-7
+
+
+def _bucket(seconds):
+    return max(0, int(math.log2(max(seconds, _MIN_SECONDS) / _MIN_SECONDS) * _BUCKETS_PER_DOUBLING))
+
+
+def _bucket_seconds(bucket):
+    # Upper edge of the bucket
+    return _MIN_SECONDS * 2 ** ((bucket + 1) / _BUCKETS_PER_DOUBLING)
+
+
+class MoveTimings:
+    """Log-scale histogram of per-move thinking times."""
+
+    def __init__(self):
+        self.counts = {}
+        self.moves = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = _bucket(seconds)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.moves += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.moves += other.moves
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Returns an upper estimate of the given percentile (0-1) in seconds."""
+        if not self.moves:
+            return 0.0
+        target = fraction * self.moves
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(_bucket_seconds(bucket), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.moves if self.moves else 0.0
+
+
+class SimulationResult:
+    """Outcome counts and move timings for a batch of games."""
+
+    def __init__(self):
+        self.games = 0
+        self.x_wins = 0
+        self.o_wins = 0
+        self.draws = 0
+        self.timings = {mark: MoveTimings() for mark in MARKS}
+
+    def merge(self, other):
+        self.games += other.games
+        self.x_wins += other.x_wins
+        self.o_wins += other.o_wins
+        self.draws += other.draws
+        for mark in MARKS:
+            self.timings[mark].merge(other.timings[mark])
+
+    def summary(self):
+        lines = ["games %d  X wins %d  O wins %d  draws %d" % (self.games, self.x_wins, self.o_wins, self.draws)]
+        for mark in MARKS:
+            timings = self.timings[mark]
+            lines.append("  %s moves %d  mean %.1fus  p50 %.1fus  p99 %.1fus  max %.1fus" % (
+                mark, timings.moves, timings.mean() * 1e6, timings.percentile(0.5) * 1e6,
+                timings.percentile(0.99) * 1e6, timings.max * 1e6))
+        return "\n".join(lines)
+
+
+def _choose_move(agent, board, mark, other_mark, game_index, rng):
+    if agent == 'random' or (agent == 'first_game' and game_index == 0):
+        return rng.choice(game_logic.available_spots(board))
+    return game_logic.ai_smart_move(board, other_mark, mark)
+
+
+def play_game(x_agent, o_agent, game_index=1, rng=random, timings=None):
+    """Plays one game and returns the winning mark, or None for a draw.
+
+    ``game_index`` is the game's number in the whole run; the first_game
+    agent plays randomly only in game 0. ``timings`` maps marks to
+    ``MoveTimings`` to record how long each move took.
+    """
+    board = game_logic.create_board()
+    agents = {'X': x_agent, 'O': o_agent}
+    mark, other_mark = 'X', 'O'
+    while True:
+        start = time.perf_counter()
+        position = _choose_move(agents[mark], board, mark, other_mark, game_index, rng)
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[mark].add(elapsed)
+
+        game_logic.place_mark(board, mark, position)
+        if game_logic.check_win(board, mark, position):
+            return mark
+        if game_logic.is_draw(board):
+            return None
+        mark, other_mark = other_mark, mark
+
+
+def _init_worker(rows, cols, win_length):
+    # The agents pick random moves themselves, so the shared AI never should
+    game_logic.set_first_game(False)
+    game_logic.set_board_size(rows, cols, win_length)
+
+
+def _play_chunk(task):
+    x_agent, o_agent, first_game, games, seed = task
+    rng = random.Random(seed)
+    result = SimulationResult()
+    for game_index in range(first_game, first_game + games):
+        winner = play_game(x_agent, o_agent, game_index, rng, result.timings)
+        result.games += 1
+        if winner == 'X':
+            result.x_wins += 1
+        elif winner == 'O':
+            result.o_wins += 1
+        else:
+            result.draws += 1
+    return result
+
+
+def simulate(games, x_agent='smart', o_agent='random', processes=None, chunk_size=1000, seed=0,
+             rows=3, cols=3, win_length=3):
+    """Plays ``games`` games across a process pool.
+
+    Yields the running ``SimulationResult`` after every finished chunk, so
+    callers can stream progress; the last one covers every game.
+    """
+    for agent in (x_agent, o_agent):
+        if agent not in AGENTS:
+            raise ValueError("Unknown agent %r, expected one of %s" % (agent, AGENTS))
+    tasks = [(x_agent, o_agent, first, min(chunk_size, games - first), seed * 1000003 + first)
+             for first in range(0, games, chunk_size)]
+
+    total = SimulationResult()
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(rows, cols, win_length)) as pool:
+        for result in pool.imap_unordered(_play_chunk, tasks):
+            total.merge(result)
+            yield total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play headless Tic Tac Toe games between AI agents.")
+    parser.add_argument('--games', type=int, default=10000, help="number of games to play")
+    parser.add_argument('--x', default='smart', choices=AGENTS, help="agent playing X (moves first)")
+    parser.add_argument('--o', default='random', choices=AGENTS, help="agent playing O")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="games per work unit")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random agents")
+    parser.add_argument('--rows', type=int, default=3, help="number of board rows")
+    parser.add_argument('--cols', type=int, default=3, help="number of board columns")
+    parser.add_argument('--win-length', type=int, default=3, help="marks in a row needed to win")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = None
+    for result in simulate(args.games, args.x, args.o, args.processes, args.chunk_size, args.seed,
+                           args.rows, args.cols, args.win_length):
+        elapsed = time.perf_counter() - start
+        print("[%.1fs, %.0f games/s] %s" % (elapsed, result.games / elapsed, result.summary()), flush=True)
+    if result is None:
+        print("No games played")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
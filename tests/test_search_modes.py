@@ -0,0 +1,100 @@
+"""Every search mode against the plain minimax search, ``bitboard.best_move``.
+
+The exact modes, 'parallel' included, must pick the very same move on
+every reachable 3x3 position and on a few 4x4 ones. 'deepening' with no
+budget may break ties differently, so only the score of its move is
+checked, and 'mcts' only on the positions its root pruning decides: a win
+on the spot or a single cell to block.
+"""
+
+import pytest
+
+from engine import bitboard, gametree
+from engine.cli import parse_board
+from engine.deepening import IterativeDeepening
+from engine.mcts import MCTS
+from engine.parallel import ParallelSearch
+from engine.session import Session
+from engine.transposition import TranspositionTable
+
+FOUR_BY_FOUR = bitboard.get_geometry(4, 4, 4)
+
+# 4x4 boards with enough stones for minimax to solve in well under a second
+FOUR_BY_FOUR_BOARDS = (
+    "XO../.XO./..X./....",
+    "X..O/.XO./..X./O...",
+    "XOX./.O../..X./...O",
+    "X.../OXO./.X../...O",
+    "XXO./OO../X.../....",
+)
+
+
+def _to_move(x_bits, o_bits):
+    # Returns (me, opp) for the side to move, X first
+    if bitboard.popcount(x_bits) == bitboard.popcount(o_bits):
+        return x_bits, o_bits
+    return o_bits, x_bits
+
+
+def _expected_moves(boards, geometry):
+    # {(me, opp): (position, score)} from the full minimax search
+    table = TranspositionTable()
+    return {(me, opp): bitboard.best_move(me, opp, table, geometry) for me, opp in boards}
+
+
+@pytest.fixture(scope='module')
+def standard_positions():
+    boards = [_to_move(position.x_bits, position.o_bits)
+              for position in gametree.positions(unique=True) if not position.finished]
+    assert len(boards) == 4520
+    return _expected_moves(boards, bitboard.STANDARD)
+
+
+@pytest.fixture(scope='module')
+def four_by_four_positions():
+    return _expected_moves([_to_move(*parse_board(board, FOUR_BY_FOUR)) for board in FOUR_BY_FOUR_BOARDS],
+                           FOUR_BY_FOUR)
+
+
+def _session(geometry, **settings):
+    return Session(geometry.rows, geometry.cols, geometry.k, first_game=False, **settings)
+
+
+def _check_same_moves(session, expected):
+    for (me, opp), (position, _) in expected.items():
+        assert session.ai_move(me, opp) == position, (me, opp)
+
+
+@pytest.mark.parametrize('mode', ['alphabeta', 'minimax'])
+def test_exact_modes_play_the_minimax_move(mode, standard_positions, four_by_four_positions):
+    _check_same_moves(_session(bitboard.STANDARD, search_mode=mode), standard_positions)
+    _check_same_moves(_session(FOUR_BY_FOUR, search_mode=mode), four_by_four_positions)
+
+
+def test_parallel_mode_plays_the_minimax_move(standard_positions, four_by_four_positions):
+    # split_seconds=0 sends every root move but the first to the worker processes
+    with ParallelSearch(processes=2, split_seconds=0) as parallel:
+        _check_same_moves(_session(bitboard.STANDARD, search_mode='parallel', parallel=parallel), standard_positions)
+        _check_same_moves(_session(FOUR_BY_FOUR, search_mode='parallel', parallel=parallel), four_by_four_positions)
+
+
+def test_unbudgeted_deepening_plays_a_move_as_good_as_minimax(standard_positions, four_by_four_positions):
+    for geometry, expected in ((bitboard.STANDARD, standard_positions), (FOUR_BY_FOUR, four_by_four_positions)):
+        session = _session(geometry, search_mode='deepening', deepening=IterativeDeepening(time_budget=None))
+        table = TranspositionTable()
+        for (me, opp), (_, score) in expected.items():
+            move = bitboard.position_bit(session.ai_move(me, opp))
+            assert -bitboard.negamax(opp, me | move, table, geometry) == score, (me, opp)
+
+
+def test_mcts_takes_wins_and_single_blocks(standard_positions):
+    geometry = bitboard.STANDARD
+    session = _session(geometry, search_mode='mcts', mcts=MCTS(geometry, time_budget=None, iterations=50, seed=1))
+    checked = 0
+    for (me, opp), (position, _) in standard_positions.items():
+        empty = geometry.full & ~(me | opp)
+        blocks = geometry.threat_bits(opp, empty)
+        if geometry.threat_bits(me, empty) or bitboard.popcount(blocks) == 1:
+            assert session.ai_move(me, opp) == position, (me, opp)
+            checked += 1
+    assert checked